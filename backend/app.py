@@ -1,9 +1,14 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
-import threading
-import time
-from scraper import KitaScraper
+import os
+import uuid
+from checkpoint import CrawlFrontier
+from jobs import JobManager
+from store import ResultStore
+from exporters import EXPORTS
+from events import EventBus
+from metrics import Metrics
 
 app = Flask(__name__)
 # Update CORS configuration
@@ -33,18 +38,23 @@ socketio = SocketIO(app,
     async_mode='threading'
 )
 
-# État global du scraping
-scraping_state = {
+# Événements regroupés en lots: c'est le bus, pas socketio, qui est passé aux scrapers
+bus = EventBus(socketio)
+
+# État renvoyé tant qu'aucun job n'a été lancé (les fiches sont dans le store, pas en mémoire)
+IDLE_STATE = {
     'status': 'idle',
     'progress': 0,
     'current_task': '',
     'stats': {'cities': 0, 'kitas': 0, 'errors': 0},
-    'data': [],
-    'should_stop': False,
-    'should_pause': False
+    'job_id': None
 }
 
-scraper = None
+store = ResultStore()
+# Mesures cumulées de tous les runs, exposées sur /api/metrics
+metrics = Metrics()
+# Jobs identifiés: au-delà de KITA_MAX_JOBS jobs simultanés, les suivants attendent dans la file
+jobs = JobManager(bus, store, metrics, max_concurrent=int(os.environ.get('KITA_MAX_JOBS', 2)))
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -52,16 +62,28 @@ def health_check():
 
 @app.route('/api/start-scraping', methods=['POST'])
 def start_scraping():
-    global scraper, scraping_state
-    
     data = request.json
     states = data.get('states', [])
     settings = data.get('settings', {
         'delay': 500,
         'maxRetries': 3,
         'timeout': 30000,
+        'engine': 'auto',  # 'auto' (HTTP + repli Selenium), 'http' ou 'selenium'
+        'mode': 'threads',  # 'processes': un processus par groupe d'états (voir 'processes')
+        'workers': 1,  # Navigateurs du pool / villes traitées en parallèle
+        'detail_workers': 4,  # Workers parallèles pour les pages de détail
+        'rate_limit': 2.0,  # Requêtes/seconde par hôte au départ, ajusté en AIMD selon les réponses
+        'max_rate_limit': 4.0,  # Plafond du débit adaptatif ('adaptive_rate': False pour un débit fixe)
+        'browser_profile': 'lean',  # 'lean' (sans images/CSS/polices/traceurs, chargement eager) ou 'full'
+        'cache': True,  # Cache disque des pages (TTL par type, revalidation ETag)
+        'incremental': False,  # Ne re-crawler que les villes dont le nombre de kitas a changé
+        'max_city_age_days': 7,  # Âge max d'une ville reportée en mode incrémental
+        'dedup': True,  # Une kita listée sous plusieurs villes n'est collectée qu'une fois
+        'detail_max_age_days': 30,  # Détails d'une kita connue réutilisés tant qu'ils ont moins de N jours
+        'discovery': 'listing',  # 'sitemap': fiches lues depuis les sitemaps, listes des villes en repli
         'extract_details': True,  # Toujours extraire les détails de contact
-        'extract_contacts': True  # Nouveau paramètre pour les contacts
+        'extract_contacts': True,  # Nouveau paramètre pour les contacts
+        'log_level': 'info'  # 'debug' pour voir chaque champ trouvé sur les fiches
     })
     
     # Ajouter le paramètre extract_details (par défaut False pour plus de rapidité)
@@ -71,87 +93,169 @@ def start_scraping():
     if not states:
         return jsonify({'error': 'No states selected'}), 400
     
-    # Réinitialiser l'état
-    scraping_state = {
-        'status': 'running',
-        'progress': 0,
-        'current_task': '',
-        'stats': {'cities': 0, 'kitas': 0, 'errors': 0},
-        'data': [],
-        'should_stop': False,
-        'should_pause': False
-    }
+    # Nouveau job, enregistré pour pouvoir le reprendre après un crash
+    job_id = uuid.uuid4().hex[:12]
+    if settings.get('checkpoint', True):
+        CrawlFrontier.create_job(job_id, states, settings).close()
+    
+    job = jobs.submit(job_id, states, settings)
+    message = 'Scraping started' if job.state['status'] == 'running' else 'Scraping queued'
+    
+    return jsonify({'message': message, 'status': job.state['status'], 'job_id': job_id})
+
+@app.route('/api/resume-job', methods=['POST'])
+def resume_job():
+    """Reprendre un job interrompu depuis son dernier checkpoint (le plus récent par défaut)"""
+    data = request.json or {}
+    job_id = data.get('job_id') or CrawlFrontier.latest_unfinished(exclude=jobs.active_ids())
+    if not job_id:
+        return jsonify({'error': 'No job to resume'}), 404
+    
+    frontier = CrawlFrontier(job_id)
+    job = frontier.load_job()
+    frontier.close()
+    if job is None:
+        return jsonify({'error': f'Unknown job {job_id}'}), 404
+    if job['status'] == 'completed':
+        return jsonify({'error': f'Job {job_id} already completed'}), 400
+    if jobs.is_active(job_id):
+        return jsonify({'error': f'Job {job_id} already running'}), 409
     
-    # Démarrer le scraping dans un thread séparé
-    scraper = KitaScraper(states, settings, socketio, scraping_state)
-    thread = threading.Thread(target=scraper.run)
-    thread.daemon = True
-    thread.start()
+    job = jobs.submit(job_id, job['states'], job['settings'])
     
-    return jsonify({'message': 'Scraping started', 'status': 'running'})
+    return jsonify({'message': 'Scraping resumed from checkpoint', 'status': job.state['status'], 'job_id': job_id})
+
+def find_job(job_id=None):
+    """Job demandé (URL, ?job_id= ou corps JSON), sinon le dernier lancé"""
+    job_id = job_id or request.args.get('job_id') or (request.get_json(silent=True) or {}).get('job_id')
+    return jobs.get(job_id)
+
+def job_not_found(job_id=None):
+    return jsonify({'error': f'Unknown job {job_id}' if job_id else 'No job'}), 404
+
+def job_status(job):
+    """État d'un job (ou l'état au repos s'il n'y en a pas) avec son nombre de fiches"""
+    state = job.state if job else IDLE_STATE
+    return {
+        'status': state['status'],
+        'progress': state['progress'],
+        'stats': state['stats'],
+        'data_count': store.count(state['job_id']),
+        'work': state.get('work'),
+        'summary': state.get('summary'),
+        'job_id': state['job_id']
+    }
 
 @app.route('/api/pause-scraping', methods=['POST'])
-def pause_scraping():
-    scraping_state['should_pause'] = True
-    scraping_state['status'] = 'paused'
-    socketio.emit('status_update', {'status': 'paused'})
-    return jsonify({'message': 'Scraping paused'})
+@app.route('/api/jobs/<job_id>/pause', methods=['POST'])
+def pause_scraping(job_id=None):
+    job = find_job(job_id)
+    if job is None:
+        return job_not_found(job_id)
+    jobs.pause(job)
+    return jsonify({'message': 'Scraping paused', 'job_id': job.job_id, 'status': job.state['status']})
 
 @app.route('/api/resume-scraping', methods=['POST'])
-def resume_scraping():
-    scraping_state['should_pause'] = False
-    scraping_state['status'] = 'running'
-    socketio.emit('status_update', {'status': 'running'})
-    return jsonify({'message': 'Scraping resumed'})
+@app.route('/api/jobs/<job_id>/resume', methods=['POST'])
+def resume_scraping(job_id=None):
+    job = find_job(job_id)
+    if job is None:
+        return job_not_found(job_id)
+    jobs.resume(job)
+    return jsonify({'message': 'Scraping resumed', 'job_id': job.job_id, 'status': job.state['status']})
 
 @app.route('/api/stop-scraping', methods=['POST'])
-def stop_scraping():
-    scraping_state['should_stop'] = True
-    scraping_state['status'] = 'stopped'
-    socketio.emit('status_update', {'status': 'stopped'})
-    return jsonify({'message': 'Scraping stopped'})
+@app.route('/api/jobs/<job_id>/stop', methods=['POST'])
+def stop_scraping(job_id=None):
+    job = find_job(job_id)
+    if job is None:
+        return job_not_found(job_id)
+    jobs.stop(job)
+    return jsonify({'message': 'Scraping stopped', 'job_id': job.job_id, 'status': job.state['status']})
 
 @app.route('/api/status', methods=['GET'])
 def get_status():
-    return jsonify({
-        'status': scraping_state['status'],
-        'progress': scraping_state['progress'],
-        'stats': scraping_state['stats'],
-        'data_count': len(scraping_state['data'])
-    })
+    job_id = request.args.get('job_id')
+    job = jobs.get(job_id)
+    if job_id and job is None:
+        return job_not_found(job_id)
+    return jsonify(job_status(job))
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """Jobs connus, du plus récent au plus ancien (en cours, en file et terminés)"""
+    return jsonify({'jobs': jobs.list(), 'max_concurrent': jobs.max_concurrent})
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return job_not_found(job_id)
+    return jsonify(dict(job.info(), data_count=store.count(job_id)))
+
+def data_filters():
+    """Filtres communs aux endpoints de données: ?state=&city=&postal_code=&id=&q="""
+    filters = {key: request.args.get(key) for key in ('id', 'state', 'city', 'postal_code')}
+    return filters, request.args.get('q')
+
+def current_job_id():
+    job = jobs.get()
+    return job.job_id if job else None
 
 @app.route('/api/data', methods=['GET'])
-def get_data():
-    """Récupérer toutes les données scrapées"""
+@app.route('/api/jobs/<job_id>/data', methods=['GET'])
+def get_data(job_id=None):
+    """Récupérer les données scrapées, paginées, filtrées et triées depuis le store"""
+    job_id = job_id or request.args.get('job_id') or current_job_id()
+    filters, search = data_filters()
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = min(1000, max(1, request.args.get('per_page', 100, type=int)))
+    
     return jsonify({
-        'data': scraping_state['data'],
-        'count': len(scraping_state['data'])
+        'data': store.query(
+            job_id, filters, search,
+            sort=request.args.get('sort', 'seq'),
+            order=request.args.get('order', 'asc'),
+            limit=per_page,
+            offset=(page - 1) * per_page
+        ),
+        'count': store.count(job_id, filters, search),
+        'page': page,
+        'per_page': per_page,
+        'job_id': job_id
     })
 
-@app.route('/api/export-csv', methods=['GET'])
-def export_csv():
-    """Exporter les données en CSV"""
-    import csv
-    import io
-    from flask import make_response
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Mesures (durées par phase, récupérations, pauses, erreurs) au format texte Prometheus"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/export/<fmt>', methods=['GET'])
+@app.route('/api/jobs/<job_id>/export/<fmt>', methods=['GET'])
+def export_data(fmt, job_id=None):
+    """Exporter les données en streaming (csv, ndjson, parquet, xlsx), avec les mêmes filtres que /api/data"""
+    if fmt not in EXPORTS:
+        return jsonify({'error': f'Format inconnu: {fmt}', 'formats': list(EXPORTS)}), 400
     
-    output = io.StringIO()
-    writer = csv.DictWriter(output, fieldnames=[
-        'id', 'name', 'street_address', 'postal_code', 'city', 'state',
-        'phone', 'email', 'website', 'url', 'description'
-    ])
-    writer.writeheader()
-    writer.writerows(scraping_state['data'])
+    job_id = job_id or request.args.get('job_id') or current_job_id()
+    filters, search = data_filters()
+    generate, mimetype, extension = EXPORTS[fmt]
     
-    response = make_response(output.getvalue())
-    response.headers['Content-Disposition'] = 'attachment; filename=kitas_export.csv'
-    response.headers['Content-Type'] = 'text/csv'
+    response = Response(stream_with_context(generate(store.iter_rows(job_id, filters, search))), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=kitas_export.{extension}'
     return response
 
+@app.route('/api/export-csv', methods=['GET'])
+def export_csv():
+    """Exporter les données en CSV"""
+    return export_data('csv')
+
 @socketio.on('connect')
 def handle_connect():
     print('Client connected')
     emit('connection_response', {'status': 'connected'})
+    # Rejouer les derniers logs et l'état courant pour un client arrivé en cours de run
+    emit('batch', {'type': 'batch', 'events': bus.replay(), 'replay': True})
 
 @socketio.on('disconnect')
 def handle_disconnect():
@@ -163,4 +267,11 @@ if __name__ == '__main__':
     print("\n⚙️ Configuration:")
     print("   - Mode de scraping: RAPIDE (sans détails)")
     print("   - Pour extraire emails/téléphones/websites, modifiez extract_details=True")
+    # Chromedriver résolu et navigateurs lancés avant le premier job (KITA_PREWARM_BROWSERS=0 pour n'en lancer aucun);
+    # avec le rechargeur de debug, seul le processus qui sert les requêtes s'en charge
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        jobs.prewarm({
+            'headless': os.environ.get('KITA_HEADLESS', '0') == '1',
+            'browser_profile': os.environ.get('KITA_BROWSER_PROFILE', 'lean')
+        }, browsers=int(os.environ.get('KITA_PREWARM_BROWSERS', 1)))
     socketio.run(app, host='0.0.0.0', port=5000, debug=True, allow_unsafe_werkzeug=True)
\ No newline at end of file
@@ -0,0 +1,290 @@
+"""Faux kita.de local pour mesurer le scraper sans toucher au vrai site
+
+Reproduit la structure lue par KitaScraper: pages d'état avec ou sans `pagination_char`,
+listes de villes `c=<lettres>` avec le suffixe '(nombre)', pages `profile_listing` paginées
+en `/p=<n>`, fiches de détail (mailto, tel, p.www, description, JSON-LD) et sitemaps
+(robots.txt, index /sitemap.xml, un /sitemaps/kitas-<état>.xml.gz par état avec lastmod).
+Latence, taux d'erreur et taille du jeu de données sont configurables.
+
+    python -m bench.fixture_server --states 3 --cities 20 --kitas 40 --latency 0.05
+"""
+import argparse
+import datetime
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote
+from scraper import ALPHABET_PAGES, STATE_SLUGS
+
+PER_PAGE = 20
+# Villes-États: pas de pagination alphabétique sur kita.de
+CITY_STATES = ('Berlin', 'Hamburg', 'Bremen')
+SYLLABLES = ['ber', 'dorf', 'hau', 'sen', 'lin', 'gen', 'burg', 'stadt', 'feld', 'ach', 'tal', 'heim']
+
+
+class FixtureSite:
+    """Jeu de données déterministe (graine `seed`) et rendu HTML des pages"""
+
+    def __init__(self, states=('Bayern', 'Berlin'), cities=10, kitas=30, seed=1, detail_rate=0.7, json_ld_rate=0.3):
+        self.rng = random.Random(seed)
+        self.letters = ALPHABET_PAGES
+        self.detail_rate = detail_rate
+        self.json_ld_rate = json_ld_rate
+        self.states = {}
+        self.cities = {}
+        self.kitas = {}
+        for state in states:
+            names = self.city_names(1 if state in CITY_STATES else cities, state)
+            self.states[self.slug(state)] = {'name': state, 'cities': names}
+            for name in names:
+                # Nombre de kitas par ville: moyenne `kitas`, quelques grandes villes
+                count = max(1, int(self.rng.expovariate(1 / kitas)))
+                self.cities[name] = {'state': state, 'count': count}
+                for idx in range(count):
+                    self.kitas[self.kita_id(name, idx)] = (name, idx)
+
+    def slug(self, state):
+        return STATE_SLUGS.get(state, state.lower())
+
+    def city_names(self, n, state):
+        if n == 1 and state in CITY_STATES:
+            return [state]
+        names = set()
+        while len(names) < n:
+            first = self.rng.choice('abcdefghiklmnoprstuvwz')
+            name = (first + ''.join(self.rng.choice(SYLLABLES) for _ in range(2))).capitalize()
+            # Noms uniques sur tout le site (une ville = un lien)
+            if name not in self.cities and name not in CITY_STATES:
+                names.add(name)
+        return sorted(names)
+
+    def group(self, name):
+        """Page alphabétique ('aä', 'tuü', ...) qui liste la ville"""
+        first = name[0].lower()
+        return next((letters for letters in self.letters if first in letters), self.letters[-1])
+
+    def page(self, body, title='kita.de'):
+        return f'<!DOCTYPE html><html><head><title>{title}</title></head><body>{body}</body></html>'
+
+    def city_link(self, name):
+        return f'<a href="/kitas/stadt/{quote(name)}">{name}</a> ({self.cities[name]["count"]})'
+
+    def state_page(self, slug):
+        state = self.states[slug]
+        if state['name'] in CITY_STATES:
+            items = ''.join(f'<li>{self.city_link(name)}</li>' for name in state['cities'])
+            return self.page(f'<h1>Kitas in {state["name"]}</h1><ul class="cities">{items}</ul>', state['name'])
+        links = ''.join(f'<li><a href="/kitas/{slug}/c={quote(letters)}">{letters.upper()}</a></li>' for letters in self.letters)
+        return self.page(f'<h1>Kitas in {state["name"]}</h1><ol class="pagination_char list-unstyled">{links}</ol>', state['name'])
+
+    def letter_page(self, slug, letters):
+        names = [name for name in self.states[slug]['cities'] if self.group(name) == letters]
+        items = ''.join(f'<li>{self.city_link(name)}</li>' for name in names)
+        return self.page(f'<ol class="cities list-unstyled">{items}</ol>')
+
+    def kita_id(self, city, idx):
+        return f'{city.lower()}-{idx}'
+
+    def listing_page(self, city, page_num):
+        count = self.cities[city]['count']
+        state = self.cities[city]['state']
+        pages = max(1, -(-count // PER_PAGE))
+        items = []
+        for idx in range((page_num - 1) * PER_PAGE, min(count, page_num * PER_PAGE)):
+            items.append(
+                f'<div class="media"><div class="media-body"><h3><a href="/kita/{self.kita_id(city, idx)}">Kita {city} {idx}</a></h3>'
+                f'<p><small>Hauptstraße {idx + 1}<br>{10000 + idx} {city}<br>{state}</small></p></div></div>'
+            )
+        pagination = ''
+        if pages > 1:
+            links = ''.join(f'<li><a href="/kitas/stadt/{quote(city)}/p={n}">{n}</a></li>' for n in range(1, pages + 1))
+            pagination = f'<ul class="pagination list-unstyled">{links}</ul>'
+        return self.page(f'<div class="profile_listing">{"".join(items)}</div>{pagination}', f'Kitas in {city}')
+
+    def detail_page(self, kita_id):
+        # Contenu stable pour une même fiche
+        rng = random.Random(kita_id)
+        city, idx = self.kitas.get(kita_id, (None, 0))
+        parts = [f'<h1>{kita_id}</h1>']
+        if rng.random() < self.detail_rate:
+            parts.append(f'<a href="mailto:info@{kita_id}.example.org">E-Mail</a>')
+        if rng.random() < self.detail_rate:
+            parts.append(f'<p class="phone">Telefon: 030 {rng.randint(100000, 999999)}</p>')
+        if rng.random() < self.detail_rate:
+            parts.append(f'<p class="www"><a href="https://{kita_id}.example.org">Website</a></p>')
+        parts.append(f'<div class="description">Die Kita {kita_id} betreut Kinder von 1 bis 6 Jahren.</div>')
+        # Nom et adresse toujours en JSON-LD (lus par la découverte par sitemap), contacts parfois
+        ld = {'@context': 'https://schema.org', '@type': 'ChildCare', 'name': kita_id}
+        if city:
+            ld.update(name=f'Kita {city} {idx}', address={
+                '@type': 'PostalAddress', 'streetAddress': f'Hauptstraße {idx + 1}', 'postalCode': str(10000 + idx),
+                'addressLocality': city, 'addressRegion': self.cities[city]['state']
+            })
+        if rng.random() < self.json_ld_rate:
+            ld.update(telephone='030 123456', email=f'kontakt@{kita_id}.example.org')
+        head = '<script type="application/ld+json">' + json.dumps(ld) + '</script>'
+        return f'<!DOCTYPE html><html><head><title>{kita_id}</title>{head}</head><body>{"".join(parts)}</body></html>'
+
+    def lastmod(self, kita_id):
+        """Date de modification stable d'une fiche (2024)"""
+        return (datetime.date(2024, 1, 1) + datetime.timedelta(days=random.Random(kita_id).randrange(365))).isoformat()
+
+    def robots(self, base):
+        return f'User-agent: *\nDisallow: /suche\nSitemap: {base}/sitemap.xml\n'
+
+    def sitemap_index(self, base):
+        items = ''.join(f'<sitemap><loc>{base}/sitemaps/kitas-{slug}.xml.gz</loc></sitemap>' for slug in self.states)
+        return ('<?xml version="1.0" encoding="UTF-8"?>'
+                f'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{items}</sitemapindex>')
+
+    def state_sitemap(self, base, slug):
+        """Sitemap compressé des fiches d'un état (octets gzip)"""
+        state = self.states[slug]['name']
+        items = ''.join(
+            f'<url><loc>{base}/kita/{kita_id}</loc><lastmod>{self.lastmod(kita_id)}</lastmod></url>'
+            for kita_id, (city, _) in self.kitas.items() if self.cities[city]['state'] == state
+        )
+        xml = ('<?xml version="1.0" encoding="UTF-8"?>'
+               f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{items}</urlset>')
+        return gzip.compress(xml.encode('utf-8'), mtime=0)
+
+    def render(self, path, base=''):
+        """Contenu de la page `path` (texte, ou octets pour un .gz), ou None (404)
+
+        `base` (schéma et hôte de la requête) sert aux URLs absolues des sitemaps.
+        """
+        path = unquote(path.split('?')[0]).rstrip('/')
+        parts = path.split('/')[1:]
+        if path == '/robots.txt':
+            return self.robots(base)
+        if path == '/sitemap.xml':
+            return self.sitemap_index(base)
+        if len(parts) == 2 and parts[0] == 'sitemaps' and parts[1].startswith('kitas-') and parts[1].endswith('.xml.gz'):
+            slug = parts[1][len('kitas-'):-len('.xml.gz')]
+            return self.state_sitemap(base, slug) if slug in self.states else None
+        if len(parts) == 2 and parts[0] == 'kitas' and parts[1] in self.states:
+            return self.state_page(parts[1])
+        if len(parts) == 3 and parts[0] == 'kitas' and parts[1] in self.states and parts[2].startswith('c='):
+            return self.letter_page(parts[1], parts[2][2:])
+        if len(parts) in (3, 4) and parts[:2] == ['kitas', 'stadt'] and parts[2] in self.cities:
+            page_num = int(parts[3][2:]) if len(parts) == 4 and parts[3].startswith('p=') else 1
+            return self.listing_page(parts[2], page_num)
+        if len(parts) == 2 and parts[0] == 'kita':
+            return self.detail_page(parts[1])
+        return None
+
+    def total_kitas(self):
+        return sum(city['count'] for city in self.cities.values())
+
+
+def content_type(path):
+    path = path.split('?')[0]
+    if path.endswith('.gz'):
+        return 'application/gzip'
+    if path.endswith('.xml'):
+        return 'application/xml; charset=utf-8'
+    if path.endswith('.txt'):
+        return 'text/plain; charset=utf-8'
+    return 'text/html; charset=utf-8'
+
+
+class FixtureServer:
+    """Serveur HTTP du faux site: latence (moyenne + jitter) et erreurs 503 configurables"""
+
+    def __init__(self, site, port=0, latency=0.0, jitter=0.0, error_rate=0.0, seed=1):
+        self.site = site
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self.handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.httpd.server_address[1]}'
+
+    def handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server.lock:
+                    server.requests += 1
+                    delay = max(0.0, server.latency + server.rng.uniform(-server.jitter, server.jitter))
+                    failed = server.rng.random() < server.error_rate
+                if delay:
+                    time.sleep(delay)
+                if failed:
+                    # Panne passagère: pas de Retry-After, qui mettrait tout l'hôte en pause
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                content = server.site.render(self.path, f"http://{self.headers.get('Host', '127.0.0.1')}")
+                if content is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = content if isinstance(content, bytes) else content.encode('utf-8')
+                etag = '"%s"' % hashlib.md5(body).hexdigest()
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type(self.path))
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='fixture-server', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def add_site_arguments(parser):
+    parser.add_argument('--states', default='Bayern,Berlin', help="États à générer (noms séparés par des virgules)")
+    parser.add_argument('--cities', type=int, default=10, help="Villes par état (hors villes-États)")
+    parser.add_argument('--kitas', type=int, default=30, help="Nombre moyen de kitas par ville")
+    parser.add_argument('--latency', type=float, default=0.0, help="Latence moyenne par requête (s)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Variation de latence (± s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Part de réponses 503")
+    parser.add_argument('--seed', type=int, default=1)
+
+
+def build_site(args):
+    return FixtureSite([s.strip() for s in args.states.split(',') if s.strip()], args.cities, args.kitas, args.seed)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Faux kita.de local")
+    add_site_arguments(parser)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    site = build_site(args)
+    server = FixtureServer(site, args.port, args.latency, args.jitter, args.error_rate, args.seed)
+    print(f"🧪 Faux kita.de sur {server.url} ({len(site.cities)} villes, {site.total_kitas()} kitas)")
+    print(f"   base_url à passer au scraper: {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
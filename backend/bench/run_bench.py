@@ -0,0 +1,207 @@
+"""Benchmark de bout en bout sur le faux kita.de (bench/fixture_server.py)
+
+Chaque scénario (moteur + paramètres) tourne dans son propre processus, avec des bases
+de données temporaires, pour mesurer séparément le débit et la mémoire de pointe.
+
+    python -m bench.run_bench --scenarios http,http-workers4,http-details --latency 0.02
+    python -m bench.run_bench --json bench.json
+    python -m bench.run_bench --baseline bench.json --tolerance 0.2   # échoue si régression
+"""
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from bench.fixture_server import FixtureServer, add_site_arguments, build_site
+
+# Paramètres communs: pas de checkpoint ni d'historique, logs réduits, débit non limité
+BASE_SETTINGS = {
+    'engine': 'http',
+    'cache': False,
+    'checkpoint': False,
+    'history': False,
+    'extract_details': False,
+    'log_level': 'error',
+    'rate_limit': 1000,
+    'max_rate_limit': 1000,
+    'rate_burst': 50
+}
+
+SCENARIOS = {
+    'http': {},
+    'http-workers4': {'workers': 4},
+    'http-details': {'extract_details': True, 'detail_workers': 8},
+    'http-cache': {'cache': True, 'passes': 2},
+    'http-sitemap': {'discovery': 'sitemap', 'detail_workers': 8},
+    'http-polite': {'rate_limit': 2.0, 'max_rate_limit': 4.0, 'rate_burst': 2},
+    'auto': {'engine': 'auto'},
+    'selenium': {'engine': 'selenium', 'headless': True},
+    'selenium-full': {'engine': 'selenium', 'headless': True, 'browser_profile': 'full'},
+}
+
+
+class NullEmitter:
+    """Remplace socketio: compte les événements sans les envoyer"""
+
+    def __init__(self):
+        self.events = 0
+
+    def emit(self, event, data=None, **kwargs):
+        self.events += 1
+
+
+def run_scenario(name, settings, states, results):
+    """Exécuter un scénario dans le processus courant et renvoyer ses mesures par `results`"""
+    import storage
+    storage.DATA_DIR = tempfile.mkdtemp(prefix=f'kita-bench-{name}-')
+    from scraper import KitaScraper
+    from store import ResultStore
+
+    passes = settings.pop('passes', 1)
+    store = ResultStore()
+    for run in range(passes):
+        # Seule la dernière passe est mesurée (cache chaud pour 'http-cache')
+        state = {
+            'job_id': f'{name}-{run}',
+            'status': 'running',
+            'progress': 0,
+            'current_task': '',
+            'stats': {'cities': 0, 'kitas': 0, 'errors': 0},
+            'should_stop': False,
+            'should_pause': False
+        }
+        emitter = NullEmitter()
+        scraper = KitaScraper(states, dict(settings), emitter, state, store=store)
+        start = time.perf_counter()
+        scraper.run()
+        elapsed = time.perf_counter() - start
+
+    summary = state.get('summary') or {'timings': {}, 'counters': {}}
+    counters = summary['counters']
+    fetched = sum(v for k, v in counters.items() if k.startswith('fetch_total['))
+    cached = counters.get('cache_total[hit]', 0)
+    results.put({
+        'scenario': name,
+        'status': state['status'],
+        'seconds': round(elapsed, 3),
+        'pages': int(fetched + cached),
+        'pages_per_s': round((fetched + cached) / elapsed, 1) if elapsed else 0,
+        'kitas': state['stats']['kitas'],
+        'kitas_per_s': round(state['stats']['kitas'] / elapsed, 1) if elapsed else 0,
+        'stored': store.count(state['job_id']),
+        'errors': state['stats']['errors'],
+        'events': emitter.events,
+        # ru_maxrss est en Ko sous Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'timings': {k: v for k, v in summary['timings'].items() if k.startswith(('phase_seconds', 'fetch_seconds'))},
+        'counters': counters
+    })
+
+
+def run_isolated(name, settings, states, timeout):
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    process = ctx.Process(target=run_scenario, args=(name, settings, states, results), daemon=True)
+    process.start()
+    try:
+        return results.get(timeout=timeout)
+    except Exception:
+        return {'scenario': name, 'status': 'crashed', 'exitcode': process.exitcode}
+    finally:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+
+
+def print_report(rows):
+    header = f"{'scénario':<16}{'statut':<11}{'s':>8}{'pages':>8}{'pages/s':>10}{'kitas':>8}{'kitas/s':>10}{'RSS Mo':>9}{'erreurs':>9}"
+    print(header)
+    print('-' * len(header))
+    for row in rows:
+        if 'seconds' not in row:
+            print(f"{row['scenario']:<16}{row['status']:<11}")
+            continue
+        print(f"{row['scenario']:<16}{row['status']:<11}{row['seconds']:>8}{row['pages']:>8}{row['pages_per_s']:>10}"
+              f"{row['kitas']:>8}{row['kitas_per_s']:>10}{row['peak_rss_mb']:>9}{row['errors']:>9}")
+    for row in rows:
+        if not row.get('timings'):
+            continue
+        print(f"\n⏱️ {row['scenario']}")
+        for name, timing in row['timings'].items():
+            print(f"   {name:<36}{timing['count']:>7}×  moy. {timing['mean'] * 1000:8.1f} ms  p95 ≤ {timing['p95'] * 1000:8.1f} ms")
+
+
+def check_baseline(rows, path, tolerance):
+    """Comparer pages/s à une exécution de référence; liste des régressions"""
+    with open(path, encoding='utf-8') as f:
+        baseline = {row['scenario']: row for row in json.load(f)['results']}
+    regressions = []
+    for row in rows:
+        ref = baseline.get(row['scenario'])
+        if not ref or 'pages_per_s' not in row or not ref.get('pages_per_s'):
+            continue
+        if row['pages_per_s'] < ref['pages_per_s'] * (1 - tolerance):
+            regressions.append(f"{row['scenario']}: {row['pages_per_s']} pages/s (référence {ref['pages_per_s']})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du scraper sur le faux kita.de")
+    add_site_arguments(parser)
+    parser.add_argument('--scenarios', default='http,http-workers4,http-details,http-cache',
+                        help=f"Scénarios à lancer parmi: {', '.join(SCENARIOS)}")
+    parser.add_argument('--set', action='append', default=[], metavar='CLÉ=VALEUR',
+                        help="Paramètre ajouté à tous les scénarios (valeur JSON), ex. --set detail_workers=16")
+    parser.add_argument('--timeout', type=float, default=600, help="Durée max d'un scénario (s)")
+    parser.add_argument('--json', help="Écrire les résultats dans ce fichier")
+    parser.add_argument('--baseline', help="Résultats de référence (--json d'un run précédent)")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Baisse de pages/s tolérée face à la référence")
+    args = parser.parse_args()
+
+    overrides = {}
+    for item in args.set:
+        key, _, value = item.partition('=')
+        try:
+            overrides[key] = json.loads(value)
+        except ValueError:
+            overrides[key] = value
+
+    site = build_site(args)
+    server = FixtureServer(site, 0, args.latency, args.jitter, args.error_rate, args.seed).start()
+    states = [site.states[slug]['name'] for slug in site.states]
+    print(f"🧪 Faux kita.de sur {server.url}: {len(states)} état(s), {len(site.cities)} villes, {site.total_kitas()} kitas")
+
+    rows = []
+    try:
+        for name in [s.strip() for s in args.scenarios.split(',') if s.strip()]:
+            if name not in SCENARIOS:
+                print(f"⚠️ Scénario inconnu: {name}")
+                continue
+            settings = dict(BASE_SETTINGS, base_url=server.url, **SCENARIOS[name])
+            settings.update(overrides)
+            print(f"▶️ {name}...")
+            rows.append(run_isolated(name, settings, states, args.timeout))
+    finally:
+        server.stop()
+
+    print()
+    print_report(rows)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'site': vars(args), 'requests': server.requests, 'results': rows}, f, indent=2)
+
+    if args.baseline:
+        regressions = check_baseline(rows, args.baseline, args.tolerance)
+        if regressions:
+            print("\n❌ Régressions:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print("\n✅ Pas de régression face à la référence")
+
+
+if __name__ == '__main__':
+    main()
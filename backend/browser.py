@@ -0,0 +1,151 @@
+import json
+import os
+import threading
+import time
+from storage import data_path
+from fetcher import USER_AGENT
+
+# Profil 'lean': ressources bloquées via CDP (seuls le HTML et le JavaScript sont utiles)
+LEAN_BLOCKED_URLS = [
+    # Images, polices, feuilles de style, médias
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.css', '*.mp4', '*.webm', '*.mp3',
+    # Publicité, mesure d'audience, traceurs
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*googlesyndication.com*', '*adservice.google.*', '*facebook.net*', '*connect.facebook.*',
+    '*hotjar.com*', '*criteo.*', '*adnxs.com*', '*taboola.com*', '*outbrain.com*', '*youtube.com*'
+]
+
+# Chemin de chromedriver résolu gardé une semaine avant une nouvelle recherche de version
+DRIVER_CACHE_TTL = 7 * 24 * 3600
+
+_driver_lock = threading.Lock()
+_driver_path = None
+
+
+def chromedriver_path(settings=None):
+    """Chemin de chromedriver, résolu une fois par processus
+
+    Ordre: paramètre 'chromedriver_path' ou CHROMEDRIVER_PATH, chemin mis en cache dans le dossier
+    de données (moins de DRIVER_CACHE_TTL), puis webdriver_manager (recherche réseau). Hors ligne,
+    un chemin en cache expiré reste utilisé; sans rien, None laisse Selenium Manager chercher le driver.
+    """
+    global _driver_path
+    explicit = (settings or {}).get('chromedriver_path') or os.environ.get('CHROMEDRIVER_PATH')
+    if explicit:
+        return explicit
+    with _driver_lock:
+        if _driver_path and os.path.exists(_driver_path):
+            return _driver_path
+
+        cache_file = data_path('chromedriver.json')
+        cached = None
+        try:
+            with open(cache_file, encoding='utf-8') as f:
+                cached = json.load(f)
+            if not os.path.exists(cached['path']):
+                cached = None
+        except (OSError, ValueError, KeyError):
+            cached = None
+
+        if cached and time.time() - cached['resolved_at'] < DRIVER_CACHE_TTL:
+            _driver_path = cached['path']
+            return _driver_path
+
+        try:
+            from webdriver_manager.chrome import ChromeDriverManager
+            path = ChromeDriverManager().install()
+        except Exception as e:
+            if cached:
+                print(f"[WARNING] Recherche de chromedriver impossible ({str(e)}), chemin en cache utilisé")
+                _driver_path = cached['path']
+                return _driver_path
+            print(f"[WARNING] Recherche de chromedriver impossible ({str(e)}), Selenium Manager en dernier recours")
+            return None
+
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump({'path': path, 'resolved_at': time.time()}, f)
+        _driver_path = path
+        return path
+
+
+def pool_key(settings):
+    """Clé du pool de navigateurs commun: seuls les jobs aux mêmes réglages de navigateur le partagent"""
+    return (
+        'driver_pool',
+        bool(settings.get('headless', False)),
+        settings.get('browser_profile', 'lean'),
+        tuple(settings.get('blocked_urls', [])),
+        settings.get('chromedriver_path'),
+        settings.get('driver_max_pages', 100)
+    )
+
+
+def create_driver(settings):
+    """Créer une nouvelle instance Chrome configurée (Selenium importé au premier navigateur)"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+
+    options = Options()
+
+    # CORRECTION 1: Désactiver headless pour voir ce qui se passe
+    if settings.get('headless', False):
+        options.add_argument("--headless=new")
+
+    # CORRECTION 2: Options pour éviter les erreurs SSL
+    options.add_argument("--ignore-certificate-errors")
+    options.add_argument("--ignore-ssl-errors")
+    options.add_argument("--allow-insecure-localhost")
+
+    # Profil 'lean' (par défaut): pas d'images, chargement 'eager', ressources inutiles bloquées.
+    # 'full' garde le navigateur de bureau complet pour comparer
+    lean = settings.get('browser_profile', 'lean') == 'lean'
+
+    # Options standards
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1280,800" if lean else "--window-size=1920,1080")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+
+    # CORRECTION 3: User agent récent et valide
+    options.add_argument(f"--user-agent={USER_AGENT}")
+
+    # CORRECTION 4: Désactiver les fonctionnalités qui peuvent bloquer
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+
+    # CORRECTION 5: Préférences pour désactiver les avertissements de sécurité
+    prefs = {
+        "profile.default_content_setting_values.notifications": 2,
+        "credentials_enable_service": False,
+        "profile.password_manager_enabled": False
+    }
+    if lean:
+        # Rendre la main dès que le DOM est prêt, sans attendre images et sous-ressources
+        options.page_load_strategy = 'eager'
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--mute-audio")
+        prefs["profile.managed_default_content_settings.images"] = 2
+    options.add_experimental_option("prefs", prefs)
+
+    path = chromedriver_path(settings)
+    service = Service(path) if path else Service()
+    driver = webdriver.Chrome(service=service, options=options)
+
+    # CORRECTION 6: Supprimer les propriétés webdriver
+    driver.execute_cdp_cmd('Network.setUserAgentOverride', {
+        "userAgent": USER_AGENT
+    })
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+
+    if lean:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {
+            'urls': LEAN_BLOCKED_URLS + list(settings.get('blocked_urls', []))
+        })
+
+    return driver
@@ -0,0 +1,119 @@
+import threading
+import time
+import zlib
+from storage import connect, data_path
+
+HOUR = 3600
+
+# Durée de validité par type de page (secondes)
+DEFAULT_TTLS = {
+    'state': 24 * HOUR,
+    'letter': 24 * HOUR,
+    'city': 12 * HOUR,
+    'page': 12 * HOUR,
+    'detail': 7 * 24 * HOUR
+}
+
+
+class CacheEntry:
+    """Page stockée dans le cache"""
+
+    def __init__(self, row):
+        self.url = row['url']
+        self.page_type = row['page_type']
+        self.html = zlib.decompress(row['body']).decode('utf-8')
+        self.final_url = row['final_url']
+        self.etag = row['etag']
+        self.last_modified = row['last_modified']
+        self.fetched_at = row['fetched_at']
+
+
+class PageCache:
+    """Cache disque des pages (SQLite), TTL par type de page et éviction LRU bornée en taille"""
+
+    def __init__(self, path=None, max_bytes=500 * 1024 * 1024, ttls=None, metrics=None):
+        self.path = path or data_path('page_cache.db')
+        self.metrics = metrics
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.lock = threading.Lock()
+        self.conn = connect(self.path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                page_type TEXT NOT NULL,
+                body BLOB NOT NULL,
+                final_url TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_pages_accessed ON pages (accessed_at);
+        """)
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url):
+        """Lire une entrée (fraîche ou non) et la marquer comme récemment utilisée"""
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM pages WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+        return CacheEntry(row)
+
+    def record(self, hit):
+        """Compter un succès ou un échec de cache"""
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if self.metrics:
+            self.metrics.inc('cache_total', result='hit' if hit else 'miss')
+
+    def is_fresh(self, entry, page_type=None):
+        ttl = self.ttls.get(page_type or entry.page_type, 0)
+        return time.time() - entry.fetched_at < ttl
+
+    def put(self, url, page_type, html, final_url=None, etag=None, last_modified=None):
+        body = zlib.compress(html.encode('utf-8'))
+        now = time.time()
+        with self.lock:
+            old = self.conn.execute("SELECT size FROM pages WHERE url = ?", (url,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (url, page_type, body, final_url, etag, last_modified, fetched_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, page_type, body, final_url or url, etag, last_modified, now, now, len(body))
+            )
+            self.total_bytes += len(body) - (old['size'] if old else 0)
+            self.evict()
+            self.conn.commit()
+
+    def touch(self, url):
+        """Entrée revalidée (HTTP 304): repartir pour un TTL complet"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute("UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+            self.conn.commit()
+
+    def evict(self):
+        """Supprimer les pages les moins récemment utilisées jusqu'à repasser sous 90% de la limite"""
+        if not self.max_bytes or self.total_bytes <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        rows = self.conn.execute("SELECT url, size FROM pages ORDER BY accessed_at ASC").fetchall()
+        for row in rows:
+            if self.total_bytes <= target:
+                break
+            self.conn.execute("DELETE FROM pages WHERE url = ?", (row['url'],))
+            self.total_bytes -= row['size']
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,68 @@
+import threading
+
+
+class Cancelled(BaseException):
+    """Run arrêté: hérite de BaseException pour traverser les `except Exception` des boucles de retry"""
+
+
+class CancelToken:
+    """Pause et arrêt d'un run, vérifiés par chaque récupération, attente et nouvelle tentative
+
+    `sleep` et `check` se réveillent dès l'arrêt (pas de boucle d'attente à pas fixe).
+    Les drapeaux 'should_stop' / 'should_pause' de `state` sont tenus à jour pour les lecteurs de l'état.
+    """
+
+    def __init__(self, state=None):
+        self.state = state
+        self.stopped = threading.Event()
+        self.running = threading.Event()
+        self.running.set()
+        self.mirror()
+
+    def mirror(self):
+        if self.state is not None:
+            self.state['should_stop'] = self.stopped.is_set()
+            self.state['should_pause'] = not self.running.is_set()
+
+    def stop(self):
+        self.stopped.set()
+        # Réveiller aussi les threads en pause
+        self.running.set()
+        self.mirror()
+
+    def pause(self):
+        if not self.stopped.is_set():
+            self.running.clear()
+            self.mirror()
+
+    def resume(self):
+        self.running.set()
+        self.mirror()
+
+    @property
+    def cancelled(self):
+        return self.stopped.is_set()
+
+    @property
+    def paused(self):
+        return not self.running.is_set()
+
+    def check(self):
+        """Lever Cancelled si le run est arrêté; bloquer tant qu'il est en pause"""
+        if not self.running.is_set():
+            self.running.wait()
+        if self.stopped.is_set():
+            raise Cancelled()
+
+    def sleep(self, seconds):
+        """Attendre `seconds`, ou lever Cancelled dès l'arrêt"""
+        if seconds > 0 and self.stopped.wait(seconds):
+            raise Cancelled()
+        self.check()
+
+
+def token_for(state):
+    """Jeton d'un état de run (créé au premier appel et gardé sous 'cancel')"""
+    if state.get('cancel') is None:
+        state['cancel'] = CancelToken(state)
+    return state['cancel']
@@ -0,0 +1,159 @@
+import json
+import threading
+import time
+from storage import connect, data_path
+from record import plain
+
+PENDING = 'pending'
+DONE = 'done'
+
+
+class CrawlFrontier:
+    """Frontière de crawl durable: états → lettres → villes → pages → détails, chacun avec un statut
+
+    Chaque unité terminée est enregistrée avec sa charge utile (villes trouvées, fiches d'une page,
+    détails d'une kita) pour qu'une reprise n'ait rien à retélécharger.
+    """
+
+    def __init__(self, job_id, path=None):
+        self.job_id = job_id
+        self.path = path or data_path('checkpoints.db')
+        self.lock = threading.Lock()
+        self.conn = connect(self.path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                states TEXT NOT NULL,
+                settings TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS units (
+                job_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                state TEXT,
+                status TEXT NOT NULL,
+                payload TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (job_id, kind, key)
+            );
+        """)
+        self.conn.commit()
+
+    @classmethod
+    def create_job(cls, job_id, states, settings, path=None):
+        """Enregistrer un nouveau crawl et ses paramètres"""
+        frontier = cls(job_id, path)
+        now = time.time()
+        with frontier.lock:
+            frontier.conn.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, states, settings, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, json.dumps(states), json.dumps(settings), 'running', now, now)
+            )
+            frontier.conn.commit()
+        return frontier
+
+    def load_job(self):
+        """Paramètres du crawl enregistré, ou None"""
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE job_id = ?", (self.job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'job_id': row['job_id'],
+            'states': json.loads(row['states']),
+            'settings': json.loads(row['settings']),
+            'status': row['status'],
+            'updated_at': row['updated_at']
+        }
+
+    @classmethod
+    def latest_unfinished(cls, path=None, exclude=()):
+        """Identifiant du dernier crawl non terminé hors `exclude` (jobs en cours), ou None"""
+        exclude = list(exclude)
+        frontier = cls(None, path)
+        with frontier.lock:
+            row = frontier.conn.execute(
+                "SELECT job_id FROM jobs WHERE status != 'completed' "
+                f"AND job_id NOT IN ({', '.join('?' * len(exclude))}) ORDER BY updated_at DESC LIMIT 1",
+                exclude
+            ).fetchone()
+        frontier.close()
+        return row['job_id'] if row else None
+
+    def set_status(self, status):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ?",
+                (status, time.time(), self.job_id)
+            )
+            self.conn.commit()
+
+    def get(self, kind, key):
+        """(statut, charge utile) d'une unité, ou (None, None)"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT status, payload FROM units WHERE job_id = ? AND kind = ? AND key = ?",
+                (self.job_id, kind, key)
+            ).fetchone()
+        if row is None:
+            return None, None
+        return row['status'], json.loads(row['payload']) if row['payload'] else None
+
+    def save(self, kind, key, status, payload=None, state=None):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO units (job_id, kind, key, state, status, payload, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.job_id, kind, key, state, status, json.dumps(payload, default=plain) if payload is not None else None, time.time())
+            )
+            self.conn.execute("UPDATE jobs SET updated_at = ? WHERE job_id = ?", (time.time(), self.job_id))
+            self.conn.commit()
+
+    def complete_many(self, kind, items, state=None):
+        """Marquer plusieurs unités terminées en une transaction: items = [(clé, charge utile)]"""
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO units (job_id, kind, key, state, status, payload, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(self.job_id, kind, key, state, DONE, json.dumps(payload, default=plain), now) for key, payload in items]
+            )
+            self.conn.commit()
+
+    def done_count(self, kind, states=None):
+        query = "SELECT COUNT(*) FROM units WHERE job_id = ? AND kind = ? AND status = ?"
+        params = [self.job_id, kind, DONE]
+        if states is not None:
+            query += f" AND state IN ({','.join('?' * len(states))})"
+            params.extend(states)
+        with self.lock:
+            return self.conn.execute(query, params).fetchone()[0]
+
+    def records(self, states=None):
+        """Fiches déjà collectées (pages terminées), détails déjà résolus fusionnés, dans l'ordre de collecte"""
+        query = "SELECT kind, payload FROM units WHERE job_id = ? AND kind IN ('page', 'detail') AND status = ?"
+        params = [self.job_id, DONE]
+        if states is not None:
+            query += f" AND state IN ({','.join('?' * len(states))})"
+            params.extend(states)
+        query += " ORDER BY rowid"
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+
+        details = {}
+        records = []
+        for row in rows:
+            payload = json.loads(row['payload'])
+            if row['kind'] == 'page':
+                records.extend(payload)
+            else:
+                details[payload['url']] = payload['details']
+        for record in records:
+            if record['url'] in details:
+                record.update(details[record['url']])
+        return records
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
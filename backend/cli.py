@@ -0,0 +1,187 @@
+"""Crawl en ligne de commande, sans Flask ni Socket.IO (cron, pipelines)
+
+Les fiches sortent en NDJSON (une par ligne) dès qu'une ville est terminée, détails compris;
+les logs vont sur stderr. Code de sortie: 0 si le crawl est complet, 130 s'il est interrompu, 1 sinon.
+
+    python cli.py Bayern Berlin --engine http --details -o kitas.ndjson
+    python cli.py Hamburg --log-level warning | jq .email
+    python cli.py --resume 3f2a9c0b1d4e -o kitas.ndjson
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import uuid
+from cancel import token_for
+from record import Kita, plain
+
+
+class NdjsonEmitter:
+    """Remplace socketio: garde les fiches d'une ville (compactes) jusqu'à 'city_done', puis les écrit en NDJSON"""
+
+    def __init__(self, out):
+        self.out = out
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.written = 0
+
+    def emit(self, event, data=None, **kwargs):
+        with self.lock:
+            if event == 'data':
+                for kita in data['kitas']:
+                    self.pending[kita['id']] = Kita(kita)
+            elif event == 'data_update':
+                for update in data['kitas']:
+                    if update['id'] in self.pending:
+                        self.pending[update['id']].update(update)
+            elif event == 'city_done':
+                self.write([self.pending.pop(kita_id) for kita_id in data['ids'] if kita_id in self.pending])
+            # Les logs sont déjà écrits sur stderr par les scrapers; progression et stats ne sont pas sorties
+
+    def write(self, records):
+        for record in records:
+            self.out.write(json.dumps(record, ensure_ascii=False, default=plain) + '\n')
+        self.out.flush()
+        self.written += len(records)
+
+    def close(self):
+        """Écrire les fiches restantes (villes interrompues ou reprises du checkpoint)"""
+        with self.lock:
+            records, self.pending = list(self.pending.values()), {}
+            self.write(records)
+
+
+def parse_settings(args):
+    settings = {
+        'engine': args.engine,
+        'workers': args.workers,
+        'detail_workers': args.detail_workers,
+        'extract_details': args.details,
+        'cache': args.cache,
+        'checkpoint': args.checkpoint,
+        'incremental': args.incremental,
+        'log_level': args.log_level,
+        'headless': not args.show_browser
+    }
+    if args.rate:
+        settings['rate_limit'] = args.rate
+    if args.max_rate:
+        settings['max_rate_limit'] = args.max_rate
+    if args.base_url:
+        settings['base_url'] = args.base_url
+    if args.processes:
+        settings.update(mode='processes', processes=args.processes)
+    for item in args.set:
+        key, _, value = item.partition('=')
+        try:
+            settings[key] = json.loads(value)
+        except ValueError:
+            settings[key] = value
+    return settings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crawl kita.de en ligne de commande (sortie NDJSON)")
+    parser.add_argument('states', nargs='*', help="États à crawler, ex. Bayern 'Baden-Württemberg'")
+    parser.add_argument('-o', '--output', help="Fichier NDJSON de sortie (stdout par défaut)")
+    parser.add_argument('--append', action='store_true', help="Ajouter au fichier de sortie au lieu de l'écraser")
+    parser.add_argument('--engine', choices=('auto', 'http', 'selenium'), default='auto')
+    parser.add_argument('--details', action=argparse.BooleanOptionalAction, default=True,
+                        help="Extraire e-mail, téléphone, site web et description")
+    parser.add_argument('--workers', type=int, default=1, help="Villes traitées en parallèle")
+    parser.add_argument('--detail-workers', type=int, default=4)
+    parser.add_argument('--processes', type=int, help="Un processus par groupe d'états")
+    parser.add_argument('--rate', type=float, help="Requêtes/seconde par hôte au départ")
+    parser.add_argument('--max-rate', type=float, help="Plafond du débit adaptatif")
+    parser.add_argument('--cache', action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument('--checkpoint', action=argparse.BooleanOptionalAction, default=True,
+                        help="Enregistrer l'avancement pour pouvoir reprendre avec --resume")
+    parser.add_argument('--resume', metavar='JOB_ID', help="Reprendre un job interrompu")
+    parser.add_argument('--incremental', action='store_true', help="Reporter les villes inchangées")
+    parser.add_argument('--log-level', choices=('debug', 'info', 'success', 'warning', 'error'), default='info')
+    parser.add_argument('--show-browser', action='store_true', help="Chrome visible (headless par défaut)")
+    parser.add_argument('--base-url', help="Autre site que https://www.kita.de (ex. bench/fixture_server.py)")
+    parser.add_argument('--set', action='append', default=[], metavar='CLÉ=VALEUR',
+                        help="Autre paramètre du scraper (valeur JSON), ex. --set cache_max_mb=100")
+    args = parser.parse_args(argv)
+
+    # Imports après l'analyse des arguments: --help reste instantané
+    from checkpoint import CrawlFrontier
+    from coordinator import StateCoordinator
+    from scraper import KitaScraper
+
+    if args.resume:
+        frontier = CrawlFrontier(args.resume)
+        job = frontier.load_job()
+        frontier.close()
+        if job is None:
+            parser.error(f"job inconnu: {args.resume}")
+        job_id, states, settings = args.resume, job['states'], dict(job['settings'], log_level=args.log_level)
+    else:
+        if not args.states:
+            parser.error("au moins un état est requis (ou --resume)")
+        job_id, states, settings = uuid.uuid4().hex[:12], args.states, parse_settings(args)
+        if settings['checkpoint']:
+            CrawlFrontier.create_job(job_id, states, settings).close()
+
+    if args.output:
+        out = open(args.output, 'a' if args.append else 'w', encoding='utf-8')
+    else:
+        # NDJSON sur une copie de la sortie standard: le descripteur 1 est redirigé pendant le run
+        sys.stdout.flush()
+        out = os.fdopen(os.dup(sys.stdout.fileno()), 'w', encoding='utf-8')
+    emitter = NdjsonEmitter(out)
+    state = {
+        'job_id': job_id,
+        'status': 'running',
+        'progress': 0,
+        'current_task': '',
+        'stats': {'cities': 0, 'kitas': 0, 'errors': 0}
+    }
+    cancel = token_for(state)
+
+    # Ctrl+C / SIGTERM: arrêt propre, les fiches déjà collectées sont écrites
+    def interrupt(signum, frame):
+        print(f"[WARNING] Signal {signum}: arrêt demandé", file=sys.stderr)
+        cancel.stop()
+
+    signal.signal(signal.SIGINT, interrupt)
+    signal.signal(signal.SIGTERM, interrupt)
+
+    if settings.get('mode') == 'processes' and len(states) > 1:
+        runner = StateCoordinator(states, settings, emitter, state)
+    else:
+        runner = KitaScraper(states, settings, emitter, state)
+
+    print(f"[INFO] Job {job_id}: {', '.join(states)}", file=sys.stderr)
+    # Les scrapers écrivent leurs logs avec print: le descripteur 1 pointe sur stderr pendant le run,
+    # y compris dans les processus workers qui en héritent, pour garder stdout au NDJSON
+    sys.stdout.flush()
+    saved_stdout = os.dup(sys.stdout.fileno())
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    try:
+        runner.run()
+        if cancel.cancelled and state['status'] == 'running':
+            state['status'] = 'stopped'
+    finally:
+        emitter.close()
+        if settings.get('checkpoint', True):
+            frontier = CrawlFrontier(job_id)
+            frontier.set_status(state['status'])
+            frontier.close()
+        out.close()
+        sys.stdout.flush()
+        os.dup2(saved_stdout, sys.stdout.fileno())
+        os.close(saved_stdout)
+
+    print(f"[INFO] {emitter.written} fiche(s) écrite(s), statut {state['status']}, "
+          f"{state['stats']['errors']} erreur(s); job {job_id}", file=sys.stderr)
+    if state['status'] == 'completed':
+        return 0
+    return 130 if state['status'] == 'stopped' else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
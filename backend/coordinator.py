@@ -0,0 +1,271 @@
+import multiprocessing
+import queue
+import threading
+from scraper import KitaScraper
+from progress import combine
+from metrics import Metrics, summary_lines
+from cancel import token_for
+from events import log_enabled
+
+
+class QueueEmitter:
+    """Remplace socketio dans un processus worker: chaque événement part dans la file du coordinateur"""
+
+    def __init__(self, events, worker_id):
+        self.events = events
+        self.worker_id = worker_id
+
+    def emit(self, event, data=None, **kwargs):
+        self.events.put((self.worker_id, event, data))
+
+
+def run_worker(worker_id, states, settings, events, stop_event, pause_event, job_id=None):
+    """Point d'entrée d'un processus worker: un KitaScraper complet avec son propre fetcher"""
+    state = {
+        'job_id': job_id,
+        'status': 'running',
+        'progress': 0,
+        'current_task': '',
+        'stats': {'cities': 0, 'kitas': 0, 'errors': 0},
+        'should_stop': False,
+        'should_pause': False
+    }
+    done = threading.Event()
+    cancel = token_for(state)
+
+    # Relayer pause/arrêt du coordinateur vers le jeton local (l'arrêt réveille aussitôt les attentes)
+    def sync_flags():
+        while not done.is_set():
+            if stop_event.wait(0.2):
+                cancel.stop()
+                return
+            if pause_event.is_set():
+                cancel.pause()
+            elif cancel.paused:
+                cancel.resume()
+
+    threading.Thread(target=sync_flags, daemon=True).start()
+
+    scraper = KitaScraper(states, settings, QueueEmitter(events, worker_id), state)
+    try:
+        scraper.run()
+    finally:
+        done.set()
+        events.put((worker_id, 'worker_done', {
+            'status': state['status'],
+            'stats': state['stats'],
+            'metrics': scraper.metrics.dump()
+        }))
+
+
+class StateCoordinator:
+    """Crawl multi-processus: chaque groupe d'états tourne dans son propre processus
+
+    Les workers renvoient logs, fiches et statistiques par une file; le coordinateur
+    met à jour `scraping_state` et relaie les événements Socket.IO comme un KitaScraper.
+    """
+
+    def __init__(self, states, settings, socketio, scraping_state, store=None, metrics=None):
+        self.states = states
+        self.settings = settings
+        self.socketio = socketio
+        self.state = scraping_state
+        self.store = store
+        # Les mesures des workers arrivent avec 'worker_done'
+        self.metrics = Metrics(parent=metrics)
+        self.worker_stats = {}
+        self.worker_progress = {}
+        self.worker_work = {}
+        self.worker_status = {}
+        self.seen_ids = set()
+        self.groups = self.split_states()
+        self.worker_settings = self.share_rate()
+
+    def split_states(self):
+        """Répartir les états en groupes (un groupe par processus)"""
+        processes = self.settings.get('processes') or multiprocessing.cpu_count()
+        processes = max(1, min(int(processes), len(self.states)))
+        groups = [[] for _ in range(processes)]
+        for idx, state in enumerate(self.states):
+            groups[idx % processes].append(state)
+        return groups
+
+    def share_rate(self):
+        """Réglages des workers: le débit par hôte est partagé entre les processus, pas multiplié
+
+        Chaque processus a son propre limiteur; sans partage, N workers enverraient N fois
+        `rate_limit` requêtes/seconde au même site.
+        """
+        processes = len(self.groups)
+        settings = dict(self.settings)
+        rate = settings.get('rate_limit') or 1000 / max(1, settings.get('delay', 500))
+        settings['rate_limit'] = rate / processes
+        settings['rate_burst'] = settings.get('rate_burst', 2) / processes
+        for key in ('min_rate_limit', 'max_rate_limit'):
+            if settings.get(key):
+                settings[key] = settings[key] / processes
+        return settings
+
+    def emit_log(self, message, level='info'):
+        """Envoyer un log au frontend (ignoré sous le niveau `log_level` des paramètres)"""
+        if not log_enabled(level, self.settings.get('log_level', 'info')):
+            return
+        self.socketio.emit('log', {
+            'type': 'log',
+            'message': message,
+            'level': level
+        })
+        print(f"[{level.upper()}] {message}")
+
+    def aggregate_stats(self):
+        totals = {'cities': 0, 'kitas': 0, 'errors': 0}
+        for stats in self.worker_stats.values():
+            for key in totals:
+                totals[key] += stats.get(key, 0)
+        totals['errors'] += sum(1 for status in self.worker_status.values() if status == 'crashed')
+        self.state['stats'] = totals
+        return totals
+
+    def overall_progress(self):
+        """Progression en unités de travail de tous les workers, sinon moyenne pondérée par leur nombre d'états"""
+        work = self.state.get('work')
+        if work and work['total_units']:
+            return work['progress']
+        done = sum(self.worker_progress.get(wid, 0) * len(group) for wid, group in enumerate(self.groups))
+        return round(min(99.9, done / max(1, len(self.states))), 1)
+
+    def handle(self, worker_id, event, data):
+        """Intégrer un événement d'un worker dans l'état global"""
+        if event == 'data':
+            # Les workers dédoublonnent leurs propres états; une kita vue par deux workers n'est relayée qu'une fois
+            kitas = [kita for kita in data['kitas'] if kita['id'] not in self.seen_ids]
+            self.seen_ids.update(kita['id'] for kita in kitas)
+            if not kitas:
+                return
+            if self.store:
+                self.store.add(self.state.get('job_id'), kitas)
+            self.socketio.emit('data', dict(data, kitas=kitas))
+        elif event == 'data_update':
+            if self.store:
+                self.store.update_details(self.state.get('job_id'), data['kitas'])
+            self.socketio.emit('data_update', data)
+        elif event == 'stats':
+            self.worker_stats[worker_id] = data['stats']
+            self.socketio.emit('stats', {'type': 'stats', 'stats': self.aggregate_stats()})
+        elif event == 'progress_update':
+            self.worker_stats[worker_id] = data['stats']
+            self.worker_progress[worker_id] = data['progress']
+            self.worker_work[worker_id] = data.get('work')
+            self.state['work'] = combine(self.worker_work.values())
+            self.state['progress'] = self.overall_progress()
+            self.state['current_task'] = data['task']
+            self.socketio.emit('progress_update', dict(
+                data,
+                progress=self.state['progress'],
+                stats=self.aggregate_stats(),
+                total_states=len(self.states),
+                processed_kitas=self.state['stats']['kitas'],
+                work=self.state['work']
+            ))
+        elif event == 'worker_done':
+            self.worker_stats[worker_id] = data['stats']
+            if data.get('metrics'):
+                self.metrics.merge(data['metrics'])
+            self.worker_status[worker_id] = data['status']
+        elif event == 'status_update':
+            # Le statut global est décidé par le coordinateur
+            pass
+        else:
+            self.socketio.emit(event, data)
+
+    def run(self):
+        """Lancer les processus et relayer leurs événements jusqu'à la fin"""
+        ctx = multiprocessing.get_context('spawn')
+        events = ctx.Queue()
+        stop_event = ctx.Event()
+        pause_event = ctx.Event()
+
+        self.emit_log(f"🧩 Coordinateur: {len(self.groups)} processus pour {len(self.states)} état(s)", "info")
+        processes = []
+        for worker_id, group in enumerate(self.groups):
+            process = ctx.Process(
+                target=run_worker,
+                args=(worker_id, group, self.worker_settings, events, stop_event, pause_event, self.state.get('job_id')),
+                name=f"kita-worker-{worker_id}",
+                daemon=True
+            )
+            process.start()
+            processes.append(process)
+            self.emit_log(f"  🚀 Worker {worker_id}: {', '.join(group)}", "info")
+
+        try:
+            while True:
+                # Propager pause/stop aux workers
+                if self.state['should_stop']:
+                    stop_event.set()
+                if self.state['should_pause']:
+                    pause_event.set()
+                else:
+                    pause_event.clear()
+
+                try:
+                    worker_id, event, data = events.get(timeout=0.5)
+                    self.handle(worker_id, event, data)
+                    continue
+                except queue.Empty:
+                    pass
+
+                # Un processus mort sans 'worker_done' a planté: ses états sont perdus, pas les autres
+                for worker_id, process in enumerate(processes):
+                    if not process.is_alive() and worker_id not in self.worker_status:
+                        self.worker_status[worker_id] = 'crashed'
+                        self.emit_log(f"❌ Worker {worker_id} arrêté (code {process.exitcode}): {', '.join(self.groups[worker_id])}", "error")
+
+                if len(self.worker_status) == len(processes):
+                    break
+        finally:
+            for process in processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+
+        stats = self.aggregate_stats()
+        summary = self.metrics.summary()
+        self.state['summary'] = summary
+        if summary['timings'] or summary['counters']:
+            self.emit_log("📈 Mesures du run (tous workers):", "info")
+            for line in summary_lines(summary):
+                self.emit_log(line, "info")
+        if self.state['should_stop']:
+            return
+
+        # Un seul worker en échec (états incomplets ou processus planté) suffit: le run n'est pas complet
+        failed = [worker_id for worker_id, status in self.worker_status.items() if status in ('error', 'crashed')]
+        if failed:
+            states = [state for worker_id in failed for state in self.groups[worker_id]]
+            self.emit_log(f"\n❌ Scraping incomplet: {len(failed)} worker(s) en échec ({', '.join(states)})", "error")
+            self.emit_log(f"⚠️ Erreurs: {stats['errors']}", "info")
+            self.state['status'] = 'error'
+            self.socketio.emit('status_update', {'status': 'error'})
+            return
+
+        self.emit_log("\n" + "="*60, "info")
+        self.emit_log("🎉 SCRAPING TERMINÉ !", "success")
+        self.emit_log("="*60, "info")
+        self.emit_log(f"📊 Kitas: {stats['kitas']}", "info")
+        self.emit_log(f"📍 Villes: {stats['cities']}", "info")
+        self.emit_log(f"⚠️ Erreurs: {stats['errors']}", "info")
+        self.state['status'] = 'completed'
+        self.state['progress'] = 100
+        if self.state.get('work'):
+            self.state['work'].update(progress=100, remaining_units=0, eta_seconds=0)
+        self.socketio.emit('status_update', {'status': 'completed'})
+        self.socketio.emit('progress_update', {
+            'progress': 100,
+            'task': "Terminé",
+            'stats': stats,
+            'current_state': "Terminé",
+            'total_states': len(self.states),
+            'processed_kitas': stats['kitas'],
+            'work': self.state.get('work')
+        })
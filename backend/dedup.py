@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+from storage import connect, data_path
+from record import plain
+
+DAY = 24 * 3600
+DETAIL_FIELDS = ('phone', 'email', 'website', 'description')
+
+
+class KitaIndex:
+    """Index des kitas par `id`, en mémoire pour le run et persisté entre les runs
+
+    Une même kita peut apparaître sous plusieurs villes ou pages alphabétiques: seule la
+    première occurrence d'un run est gardée (`claim`). Les détails déjà extraits sont
+    conservés avec leur date, pour ne pas retélécharger la fiche tant qu'ils sont récents.
+    """
+
+    def __init__(self, path=None, max_age_days=30):
+        self.path = path or data_path('kitas.db')
+        self.max_age = max_age_days * DAY
+        self.lock = threading.Lock()
+        self.seen = set()
+        self.conn = connect(self.path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS kitas (
+                id TEXT PRIMARY KEY,
+                url TEXT,
+                details TEXT,
+                detailed_at REAL,
+                seen_at REAL NOT NULL,
+                record TEXT
+            );
+        """)
+        # Index créé avant la découverte par sitemap: fiche complète absente
+        if 'record' not in {row['name'] for row in self.conn.execute("PRAGMA table_info(kitas)")}:
+            self.conn.execute("ALTER TABLE kitas ADD COLUMN record TEXT")
+        self.conn.commit()
+        # Ids connus des runs précédents (une lecture, puis tests en mémoire)
+        self.known = {row['id'] for row in self.conn.execute("SELECT id FROM kitas")}
+
+    def claim(self, kitas):
+        """Garder les fiches dont l'id n'a pas encore été vu pendant ce run (ordre conservé)"""
+        fresh = []
+        with self.lock:
+            for kita in kitas:
+                if kita['id'] not in self.seen:
+                    self.seen.add(kita['id'])
+                    fresh.append(kita)
+        return fresh
+
+    def mark(self, kitas):
+        """Fiches déjà émises par ailleurs (reprise de checkpoint): ids vus pour ce run"""
+        with self.lock:
+            self.seen.update(kita['id'] for kita in kitas)
+
+    def touch(self, kitas):
+        """Enregistrer les ids rencontrés (date de dernière apparition)"""
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO kitas (id, url, seen_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET url = excluded.url, seen_at = excluded.seen_at",
+                [(kita['id'], kita.get('url'), now) for kita in kitas]
+            )
+            self.conn.commit()
+            self.known.update(kita['id'] for kita in kitas)
+
+    def fresh_details(self, kitas):
+        """Détails encore valides des kitas connues, par id (les autres sont à extraire)"""
+        ids = [kita['id'] for kita in kitas if kita['id'] in self.known]
+        if not ids:
+            return {}
+        found = {}
+        oldest = time.time() - self.max_age
+        with self.lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT id, details FROM kitas WHERE id IN ({', '.join('?' * len(chunk))}) "
+                    "AND details IS NOT NULL AND detailed_at >= ?",
+                    chunk + [oldest]
+                ).fetchall()
+                found.update((row['id'], json.loads(row['details'])) for row in rows)
+        return found
+
+    def record_details(self, kitas):
+        """Enregistrer les détails fraîchement extraits"""
+        if not kitas:
+            return
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO kitas (id, url, details, detailed_at, seen_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET details = excluded.details, detailed_at = excluded.detailed_at",
+                [(kita['id'], kita.get('url'), json.dumps({f: kita.get(f) for f in DETAIL_FIELDS}), now, now)
+                 for kita in kitas]
+            )
+            self.conn.commit()
+            self.known.update(kita['id'] for kita in kitas)
+
+    def fresh_records(self, entries):
+        """Fiches complètes encore à jour pour les entrées (url, lastmod) d'un sitemap, par id
+
+        Une fiche est à jour si elle a été extraite après son `lastmod`; sans `lastmod`,
+        elle l'est tant qu'elle a moins de `max_age_days`.
+        """
+        lastmods = {url.rstrip('/').split('/')[-1]: lastmod for url, lastmod in entries}
+        ids = [kita_id for kita_id in lastmods if kita_id in self.known]
+        found = {}
+        oldest = time.time() - self.max_age
+        with self.lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT id, record, details, detailed_at FROM kitas WHERE id IN ({', '.join('?' * len(chunk))}) "
+                    "AND record IS NOT NULL",
+                    chunk
+                ).fetchall()
+                for row in rows:
+                    lastmod = lastmods[row['id']]
+                    if row['detailed_at'] >= (lastmod if lastmod is not None else oldest):
+                        # Détails éventuellement réextraits depuis par un crawl des listes
+                        found[row['id']] = dict(json.loads(row['record']), **json.loads(row['details'] or '{}'))
+        return found
+
+    def record_profiles(self, kitas):
+        """Enregistrer des fiches complètes lues sur leur page (découverte par sitemap)"""
+        if not kitas:
+            return
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO kitas (id, url, details, detailed_at, seen_at, record) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET url = excluded.url, details = excluded.details, "
+                "detailed_at = excluded.detailed_at, seen_at = excluded.seen_at, record = excluded.record",
+                [(kita['id'], kita.get('url'), json.dumps({f: kita.get(f) for f in DETAIL_FIELDS}), now, now,
+                  json.dumps(kita, ensure_ascii=False, default=plain))
+                 for kita in kitas]
+            )
+            self.conn.commit()
+            self.known.update(kita['id'] for kita in kitas)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
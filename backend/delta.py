@@ -0,0 +1,76 @@
+import json
+import threading
+import time
+import zlib
+from storage import connect, data_path
+from record import plain
+
+DAY = 24 * 3600
+
+
+class CityHistory:
+    """Historique des villes entre deux runs: nombre de kitas de l'index, ids et fiches du dernier crawl
+
+    Sert au mode incrémental: une ville dont le compteur 'Ville (123)' n'a pas changé et dont
+    le dernier crawl est assez récent n'est pas re-crawlée, ses fiches sont reportées.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or data_path('history.db')
+        self.lock = threading.Lock()
+        self.conn = connect(self.path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS cities (
+                link TEXT PRIMARY KEY,
+                state TEXT,
+                name TEXT,
+                count INTEGER NOT NULL,
+                kita_ids TEXT NOT NULL,
+                records BLOB NOT NULL,
+                with_details INTEGER NOT NULL DEFAULT 0,
+                crawled_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_cities_state ON cities (state);
+        """)
+        self.conn.commit()
+
+    def get(self, link):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT count, kita_ids, with_details, crawled_at FROM cities WHERE link = ?", (link,)
+            ).fetchone()
+
+    def is_unchanged(self, city_info, max_age_days=7, with_details=False):
+        """Même nombre de kitas qu'au dernier crawl, et crawl plus récent que `max_age_days`"""
+        row = self.get(city_info['link'])
+        if row is None or not city_info.get('count'):
+            return False
+        if row['count'] != city_info['count']:
+            return False
+        if with_details and not row['with_details']:
+            return False
+        return time.time() - row['crawled_at'] < max_age_days * DAY
+
+    def records(self, link):
+        """Fiches enregistrées lors du dernier crawl de la ville"""
+        with self.lock:
+            row = self.conn.execute("SELECT records FROM cities WHERE link = ?", (link,)).fetchone()
+        if row is None:
+            return []
+        return json.loads(zlib.decompress(row['records']).decode('utf-8'))
+
+    def record(self, state, city_info, kitas, with_details=False):
+        """Enregistrer le résultat d'un crawl complet de la ville"""
+        body = zlib.compress(json.dumps(kitas, default=plain).encode('utf-8'))
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cities (link, state, name, count, kita_ids, records, with_details, crawled_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (city_info['link'], state, city_info['name'], city_info.get('count') or 0,
+                 json.dumps([kita['id'] for kita in kitas]), body, int(with_details), time.time())
+            )
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
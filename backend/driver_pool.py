@@ -0,0 +1,159 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PooledDriver:
+    """Navigateur du pool avec son compteur de pages"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.time()
+
+    def is_healthy(self):
+        """Vérifier que Chrome répond encore"""
+        try:
+            self.driver.current_url
+            return len(self.driver.window_handles) > 0
+        except Exception:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class DriverPool:
+    """Pool borné de navigateurs Chrome partagé entre les workers
+
+    Un navigateur est recyclé après un crash, un contrôle de santé raté,
+    ou après `max_pages` pages pour limiter la croissance mémoire de Chrome.
+    `factory` et `on_recycle` peuvent être remplacés à chaque emprunt (pool commun à plusieurs jobs).
+    """
+
+    def __init__(self, factory, size=1, max_pages=100, on_recycle=None):
+        self.factory = factory
+        self.size = max(1, int(size))
+        self.max_pages = max_pages
+        self.on_recycle = on_recycle
+        self.idle = queue.LifoQueue()
+        self.created = 0
+        self.launched = 0
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def acquire(self, timeout=None, cancel=None, factory=None, on_recycle=None):
+        """Obtenir un navigateur sain (en démarre un avec `factory` si le pool n'est pas plein)
+
+        Avec `cancel`, l'attente d'un navigateur libre s'interrompt dès l'arrêt du run.
+        """
+        while True:
+            try:
+                pooled = self.idle.get_nowait()
+            except queue.Empty:
+                pooled = None
+                with self.lock:
+                    can_create = self.created < self.size
+                    if can_create:
+                        self.created += 1
+                if can_create:
+                    try:
+                        pooled = PooledDriver((factory or self.factory)())
+                    except Exception:
+                        with self.lock:
+                            self.created -= 1
+                        raise
+                    with self.lock:
+                        self.launched += 1
+                    return pooled
+                pooled = self.wait_idle(timeout, cancel)
+
+            if pooled.is_healthy():
+                return pooled
+            self._discard(pooled, "contrôle de santé échoué", on_recycle)
+
+    def warm(self, count=None):
+        """Démarrer à l'avance jusqu'à `count` navigateurs, laissés inactifs dans le pool
+
+        Retourne le nombre de navigateurs lancés; les runs suivants les obtiennent sans démarrage à froid.
+        """
+        count = min(count or self.size, self.size)
+        started = 0
+        while not self.closed:
+            with self.lock:
+                if self.created >= count:
+                    return started
+                self.created += 1
+            try:
+                pooled = PooledDriver(self.factory())
+            except Exception:
+                with self.lock:
+                    self.created -= 1
+                raise
+            with self.lock:
+                self.launched += 1
+            self.idle.put(pooled)
+            started += 1
+        return started
+
+    def wait_idle(self, timeout=None, cancel=None):
+        if cancel is None:
+            return self.idle.get(timeout=timeout)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            cancel.check()
+            step = 0.5 if deadline is None else min(0.5, deadline - time.monotonic())
+            if step <= 0:
+                raise queue.Empty
+            try:
+                return self.idle.get(timeout=step)
+            except queue.Empty:
+                continue
+
+    def release(self, pooled, broken=False, on_recycle=None):
+        """Rendre un navigateur au pool, ou le recycler s'il est usé ou cassé"""
+        pooled.pages += 1
+        if self.closed:
+            self._discard(pooled, None)
+        elif broken:
+            self._discard(pooled, "crash", on_recycle)
+        elif self.max_pages and pooled.pages >= self.max_pages:
+            self._discard(pooled, f"{pooled.pages} pages", on_recycle)
+        else:
+            self.idle.put(pooled)
+
+    def _discard(self, pooled, reason, on_recycle=None):
+        pooled.quit()
+        with self.lock:
+            self.created -= 1
+        on_recycle = on_recycle or self.on_recycle
+        if reason and on_recycle:
+            on_recycle(reason)
+
+    @contextmanager
+    def lease(self, timeout=None, cancel=None, factory=None, on_recycle=None):
+        """Réserver un navigateur le temps d'une suite d'opérations"""
+        from selenium.common.exceptions import WebDriverException
+        pooled = self.acquire(timeout, cancel, factory, on_recycle)
+        broken = False
+        try:
+            yield pooled.driver
+        except WebDriverException:
+            broken = not pooled.is_healthy()
+            raise
+        finally:
+            self.release(pooled, broken, on_recycle)
+
+    def close(self):
+        """Fermer tous les navigateurs inactifs (ceux en cours d'usage sont fermés à leur retour)"""
+        self.closed = True
+        while True:
+            try:
+                pooled = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(pooled, None)
@@ -0,0 +1,105 @@
+import collections
+import threading
+
+# Ordre des niveaux de log (les niveaux inconnus passent comme 'info')
+LOG_LEVELS = {'debug': 10, 'info': 20, 'success': 25, 'warning': 30, 'error': 40}
+
+# Seul le dernier événement de ces types compte: les précédents d'un même lot sont remplacés
+LATEST_ONLY = ('progress', 'progress_update', 'stats')
+# Fiches fusionnées dans un seul événement quand elles se suivent
+MERGED = ('data', 'data_update')
+# Envoyés immédiatement (avec tout ce qui précède) pour que l'interface réagisse sans délai
+URGENT = ('status_update', 'error')
+
+
+def log_enabled(level, threshold='info'):
+    """Le niveau `level` passe-t-il le filtre `threshold` ?"""
+    return LOG_LEVELS.get(level, 20) >= LOG_LEVELS.get(threshold, 20)
+
+
+class EventBus:
+    """Regroupe les événements Socket.IO en lots bornés en temps et en taille
+
+    S'utilise à la place de socketio (même méthode `emit`): les logs sous le niveau configuré
+    sont écartés, progression et stats sont dédoublonnées, les fiches consécutives fusionnées,
+    et un lot 'batch' part toutes les `interval` secondes ou dès `max_batch` éléments.
+    Les derniers logs et le dernier état sont gardés pour les clients qui se connectent en cours de run.
+    """
+
+    def __init__(self, socketio, interval=0.25, max_batch=500, log_level='info', replay_size=500):
+        self.socketio = socketio
+        self.interval = interval
+        self.max_batch = max_batch
+        self.log_level = log_level
+        self.lock = threading.Lock()
+        self.pending = []
+        self.size = 0
+        self.logs = collections.deque(maxlen=replay_size)
+        self.latest = {}
+        self.wake = threading.Event()
+        self.thread = None
+        self.sent = 0
+        self.received = 0
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.loop, name='event-bus', daemon=True)
+            self.thread.start()
+
+    def emit(self, event, data=None, log_level=None, **kwargs):
+        """Ajouter un événement au lot en cours (`log_level`: seuil propre à l'émetteur, sinon celui du bus)"""
+        if event == 'log' and not log_enabled((data or {}).get('level', 'info'), log_level or self.log_level):
+            return
+        self.start()
+        # Plusieurs jobs partagent le bus: dédoublonnage et fusion se font job par job
+        job_id = data.get('job_id') if isinstance(data, dict) else None
+        with self.lock:
+            self.received += 1
+            if event == 'log':
+                self.logs.append(data)
+            elif event in LATEST_ONLY or event in URGENT or event == 'job_update':
+                self.latest[(event, job_id)] = data
+
+            if event in LATEST_ONLY:
+                self.pending = [item for item in self.pending
+                                if item['event'] != event or item['data'].get('job_id') != job_id]
+            if (event in MERGED and self.pending and self.pending[-1]['event'] == event
+                    and self.pending[-1]['data'].get('job_id') == job_id):
+                self.pending[-1]['data']['kitas'].extend(data['kitas'])
+            elif event in MERGED:
+                self.pending.append({'event': event, 'data': dict(data, kitas=list(data['kitas']))})
+            else:
+                self.pending.append({'event': event, 'data': data})
+            self.size += len(data['kitas']) if event in MERGED else 1
+
+        if event in URGENT or self.size >= self.max_batch:
+            self.wake.set()
+
+    def flush(self):
+        """Envoyer le lot en cours (s'il n'est pas vide)"""
+        with self.lock:
+            events, self.pending, self.size = self.pending, [], 0
+        if events:
+            self.sent += 1
+            self.socketio.emit('batch', {'type': 'batch', 'events': events})
+
+    def loop(self):
+        while True:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[ERROR] Envoi du lot d'événements: {str(e)}")
+
+    def forget(self, job_id):
+        """Oublier le dernier état d'un job (appelé quand le JobManager l'oublie)"""
+        with self.lock:
+            self.latest = {key: data for key, data in self.latest.items() if key[1] != job_id}
+
+    def replay(self):
+        """Derniers logs puis dernier état connu, à envoyer à un client qui vient de se connecter"""
+        with self.lock:
+            events = [{'event': 'log', 'data': log} for log in self.logs]
+            events.extend({'event': event, 'data': data} for (event, _), data in self.latest.items())
+        return events
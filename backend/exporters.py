@@ -0,0 +1,120 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from store import FIELDS
+
+# Nombre de fiches par morceau envoyé (et par groupe de lignes Parquet)
+CHUNK_ROWS = 1000
+
+
+def batches(rows, size=CHUNK_ROWS):
+    """Regrouper un itérateur de fiches en listes de `size`"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ChunkSink:
+    """Fichier en écriture seule dont le contenu est vidé à chaque morceau envoyé"""
+
+    def __init__(self):
+        self.parts = []
+        self.closed = False
+        self.position = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def export_csv(rows):
+    """CSV, un morceau par lot de fiches"""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=FIELDS)
+    writer.writeheader()
+    for batch in batches(rows):
+        writer.writerows(batch)
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate()
+    if output.tell():
+        yield output.getvalue()
+
+
+def export_ndjson(rows):
+    """Une fiche JSON par ligne"""
+    for batch in batches(rows):
+        yield ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in batch)
+
+
+def export_parquet(rows):
+    """Parquet écrit par groupes de lignes, chaque groupe envoyé dès qu'il est écrit"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(field, pa.string()) for field in FIELDS])
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema)
+    try:
+        for batch in batches(rows):
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_xlsx(rows):
+    """XLSX via le mode write_only d'openpyxl (lignes écrites sur disque, pas gardées en mémoire)"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Kitas')
+    sheet.append(FIELDS)
+    for row in rows:
+        sheet.append([row.get(field) for field in FIELDS])
+
+    # Le zip n'est complet qu'à la sauvegarde: passer par un fichier temporaire lu par morceaux
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        workbook.save(path)
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(64 * 1024)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+# format → (générateur, type MIME, extension)
+EXPORTS = {
+    'csv': (export_csv, 'text/csv; charset=utf-8', 'csv'),
+    'ndjson': (export_ndjson, 'application/x-ndjson', 'ndjson'),
+    'parquet': (export_parquet, 'application/vnd.apache.parquet', 'parquet'),
+    'xlsx': (export_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
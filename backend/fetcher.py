@@ -0,0 +1,351 @@
+import functools
+import re
+import time
+import lxml.html
+import requests
+from requests.adapters import HTTPAdapter
+from ratelimit import backoff
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36'
+
+
+def has_class(name):
+    """Prédicat XPath: l'élément porte la classe CSS `name`"""
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+@functools.lru_cache(maxsize=64)
+def css_to_xpath(selector):
+    """XPath d'un sélecteur CSS simple (balises, classes, descendants, listes), ou None si non géré"""
+    paths = []
+    for part in selector.split(','):
+        steps = []
+        for step in part.split():
+            match = re.fullmatch(r'([a-zA-Z][\w-]*)?((?:\.[\w-]+)*)', step)
+            if not match or not (match.group(1) or match.group(2)):
+                return None
+            classes = ''.join(f'[{has_class(c)}]' for c in match.group(2).split('.')[1:])
+            steps.append(f"{match.group(1) or '*'}{classes}")
+        if not steps:
+            return None
+        paths.append('//' + '//'.join(steps))
+    return ' | '.join(paths)
+
+
+class FetchResult:
+    """Page récupérée par un moteur (HTTP ou navigateur)"""
+
+    def __init__(self, url, html, status_code=200, engine='http', final_url=None, etag=None, last_modified=None):
+        self.url = url
+        self.html = html or ''
+        self.status_code = status_code
+        self.engine = engine
+        self.final_url = final_url or url
+        self.etag = etag
+        self.last_modified = last_modified
+        self._soup = None
+        self._tree = None
+
+    @classmethod
+    def from_cache(cls, entry):
+        return cls(entry.url, entry.html, 200, 'cache', entry.final_url, entry.etag, entry.last_modified)
+
+    @property
+    def ok(self):
+        return 200 <= self.status_code < 400
+
+    @property
+    def soup(self):
+        """Document parsé une seule fois avec lxml"""
+        if self._soup is None:
+            # bs4 n'est chargé que pour les sélecteurs que lxml ne sait pas traduire
+            from bs4 import BeautifulSoup
+            self._soup = BeautifulSoup(self.html, 'lxml')
+        return self._soup
+
+    @property
+    def tree(self):
+        """Document lxml (requêtes XPath), bien plus rapide à construire que la soupe"""
+        if self._tree is None:
+            self._tree = lxml.html.document_fromstring(self.html if self.html.strip() else '<html></html>')
+        return self._tree
+
+    @property
+    def title(self):
+        return ' '.join(self.tree.findtext('.//title', default='').split())
+
+    def has(self, selector):
+        """Vérifier la présence d'au moins un élément correspondant au sélecteur CSS"""
+        xpath = css_to_xpath(selector)
+        if xpath is None:
+            return self.soup.select_one(selector) is not None
+        return bool(self.tree.xpath(xpath))
+
+
+def retry_after(response):
+    """Délai demandé par l'en-tête Retry-After (en secondes), ou None"""
+    value = response.headers.get('Retry-After', '')
+    return min(float(value), 300.0) if value.strip().isdigit() else None
+
+
+class HttpFetcher:
+    """Moteur HTTP léger: session requests mutualisée, sans rendu JavaScript"""
+
+    engine = 'http'
+
+    def __init__(self, timeout=30, pool_size=10, user_agent=USER_AGENT, rate_limiter=None, metrics=None, retries=2,
+                 cancel=None, on_rate_change=None):
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        # Baisses de débit signalées au job de ce fetcher (le limiteur peut être commun à plusieurs jobs)
+        self.on_rate_change = on_rate_change
+        self.retries = retries
+        self.metrics = metrics
+        self.cancel = cancel
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'User-Agent': user_agent,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'de-DE,de;q=0.9,en;q=0.8'
+        })
+
+    def fetch(self, url, ready=None, validators=None):
+        """GET simple, ou conditionnel si `validators` (entrée de cache) porte un ETag / Last-Modified
+
+        Un 429 ou une erreur 5xx est retenté après une attente: un 429 ou un Retry-After met tout l'hôte
+        en pause, une erreur 5xx isolée ne fait attendre que cette requête (backoff).
+        """
+        headers = {}
+        if validators is not None:
+            if validators.etag:
+                headers['If-None-Match'] = validators.etag
+            if validators.last_modified:
+                headers['If-Modified-Since'] = validators.last_modified
+        for attempt in range(self.retries + 1):
+            if self.cancel:
+                self.cancel.check()
+            if self.rate_limiter:
+                self.rate_limiter.acquire(url, self.cancel)
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, timeout=self.timeout, headers=headers)
+            except requests.RequestException:
+                if self.rate_limiter:
+                    self.rate_limiter.report(url, error=True, on_change=self.on_rate_change)
+                raise
+            latency = time.perf_counter() - start
+            if self.rate_limiter:
+                self.rate_limiter.report(url, response.status_code, latency, on_change=self.on_rate_change)
+            if self.metrics:
+                self.metrics.observe('fetch_seconds', latency, engine=self.engine)
+                self.metrics.inc('fetch_total', engine=self.engine, status=response.status_code)
+                self.metrics.inc('fetch_bytes_total', len(response.content), engine=self.engine)
+            
+            if (response.status_code == 429 or response.status_code >= 500) and attempt < self.retries:
+                requested = retry_after(response)
+                wait = requested or backoff(attempt)
+                if self.metrics:
+                    self.metrics.inc('retries_total', phase='http')
+                if self.rate_limiter and (requested or response.status_code == 429):
+                    self.rate_limiter.block(url, wait)
+                elif self.cancel:
+                    self.cancel.sleep(wait)
+                else:
+                    time.sleep(wait)
+                continue
+            break
+        return FetchResult(
+            url, response.text, response.status_code, self.engine, response.url,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified')
+        )
+
+    def open_stream(self, url):
+        """GET en streaming (sitemaps volumineux): le corps est lu au fil du parsing via `response.raw`
+
+        L'appelant ferme la réponse. Pas de nouvelle tentative: une erreur HTTP lève HTTPError.
+        """
+        if self.cancel:
+            self.cancel.check()
+        if self.rate_limiter:
+            self.rate_limiter.acquire(url, self.cancel)
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, timeout=self.timeout, stream=True)
+        except requests.RequestException:
+            if self.rate_limiter:
+                self.rate_limiter.report(url, error=True, on_change=self.on_rate_change)
+            raise
+        latency = time.perf_counter() - start
+        if self.rate_limiter:
+            self.rate_limiter.report(url, response.status_code, latency, on_change=self.on_rate_change)
+        if self.metrics:
+            self.metrics.observe('fetch_seconds', latency, engine=self.engine)
+            self.metrics.inc('fetch_total', engine=self.engine, status=response.status_code)
+        if not response.ok:
+            response.close()
+            response.raise_for_status()
+        # Content-Encoding (gzip du transport) décodé à la lecture
+        response.raw.decode_content = True
+        return response
+
+    def close(self):
+        self.session.close()
+
+
+class BrowserFetcher:
+    """Moteur Selenium: rendu JavaScript complet sur les navigateurs d'un DriverPool
+
+    Selenium n'est importé qu'au premier usage: un crawl purement HTTP ne le charge jamais.
+    `launch`, `on_recycle` et `on_rate_change` sont ceux du job: ils sont passés à chaque emprunt
+    et à chaque réponse, le pool et le limiteur pouvant être communs à plusieurs jobs.
+    """
+
+    engine = 'selenium'
+
+    def __init__(self, pool, timeout=10, rate_limiter=None, metrics=None, cancel=None, launch=None, on_recycle=None,
+                 on_rate_change=None):
+        self.pool = pool
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self.cancel = cancel
+        self.launch = launch
+        self.on_recycle = on_recycle
+        self.on_rate_change = on_rate_change
+
+    def session(self):
+        """Réserver un navigateur du pool pour une suite d'opérations"""
+        return self.pool.lease(cancel=self.cancel, factory=self.launch, on_recycle=self.on_recycle)
+
+    def until(self, driver, condition, timeout=None):
+        """WebDriverWait dont chaque interrogation vérifie aussi l'arrêt du run"""
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        def check(d):
+            if self.cancel:
+                self.cancel.check()
+            return condition(d)
+        return WebDriverWait(driver, timeout or self.timeout).until(check)
+
+    def navigate(self, driver, url):
+        """Naviguer vers une URL en respectant la limite de débit"""
+        if self.cancel:
+            self.cancel.check()
+        if self.rate_limiter:
+            self.rate_limiter.acquire(url, self.cancel)
+        start = time.perf_counter()
+        try:
+            driver.get(url)
+        except Exception:
+            if self.rate_limiter:
+                self.rate_limiter.report(url, error=True, on_change=self.on_rate_change)
+            raise
+        latency = time.perf_counter() - start
+        if self.rate_limiter:
+            # driver.get inclut le rendu de Chrome: ce n'est pas la latence du serveur, le limiteur ne la voit pas
+            self.rate_limiter.report(url, 200, on_change=self.on_rate_change)
+        if self.metrics:
+            self.metrics.observe('fetch_seconds', latency, engine=self.engine)
+            self.metrics.inc('fetch_total', engine=self.engine, status=200)
+
+    def fetch(self, url, ready=None):
+        from selenium.webdriver.common.by import By
+        from selenium.common.exceptions import TimeoutException
+        with self.session() as driver:
+            self.navigate(driver, url)
+
+            # Attendre que le contenu attendu soit rendu par le JavaScript
+            if ready:
+                try:
+                    self.until(driver, lambda d: len(d.find_elements(By.CSS_SELECTOR, ready)) > 0)
+                except TimeoutException:
+                    if self.metrics:
+                        self.metrics.inc('timeouts_total', phase='render')
+
+            html = driver.page_source
+            if self.metrics:
+                self.metrics.inc('fetch_bytes_total', len(html.encode('utf-8')), engine=self.engine)
+            return FetchResult(url, html, 200, self.engine, driver.current_url)
+
+    def close(self):
+        self.pool.close()
+
+
+class HybridFetcher:
+    """HTTP d'abord, repli automatique sur Selenium quand la page exige du JavaScript
+
+    Modes: 'auto' (HTTP puis repli), 'http' (jamais de navigateur), 'selenium' (toujours le navigateur).
+    Avec un `cache` et un `page_type`, les pages sont lues via le cache disque et revalidées en HTTP.
+    """
+
+    MODES = ('auto', 'http', 'selenium')
+
+    def __init__(self, http, browser, mode='auto', on_fallback=None, cache=None):
+        if mode not in self.MODES:
+            raise ValueError(f"Moteur inconnu: {mode}")
+        self.http = http
+        self.browser = browser
+        self.mode = mode
+        self.on_fallback = on_fallback
+        self.cache = cache
+
+    def store(self, result, page_type):
+        """Mettre en cache une page valide"""
+        if self.cache and page_type and result.ok and result.engine != 'cache':
+            self.cache.put(result.url, page_type, result.html, result.final_url, result.etag, result.last_modified)
+
+    def fetch(self, url, ready=None, page_type=None):
+        """Récupérer une page; `ready` est le sélecteur CSS qui prouve que le contenu est présent"""
+        entry = None
+        if self.cache and page_type:
+            entry = self.cache.get(url)
+            if entry and self.cache.is_fresh(entry, page_type):
+                self.cache.record(True)
+                return FetchResult.from_cache(entry)
+
+        result = self.fetch_live(url, ready, entry)
+        if self.cache and page_type:
+            if result.engine == 'cache':
+                # 304 Not Modified: l'entrée reste valide
+                self.cache.touch(url)
+                self.cache.record(True)
+            else:
+                self.cache.record(False)
+                if ready is None or result.has(ready):
+                    self.store(result, page_type)
+        return result
+
+    def fetch_live(self, url, ready=None, entry=None):
+        """Récupération réseau: HTTP (conditionnel si `entry`), puis repli navigateur"""
+        if self.mode == 'selenium':
+            return self.browser.fetch(url, ready)
+
+        result = None
+        try:
+            result = self.http.fetch(url, ready, validators=entry)
+            if result.status_code == 304 and entry is not None:
+                return FetchResult.from_cache(entry)
+            if result.ok and (ready is None or result.has(ready)):
+                return result
+            reason = f"HTTP {result.status_code}" if not result.ok else f"'{ready}' absent"
+        except requests.RequestException as e:
+            if self.mode == 'http':
+                raise
+            reason = str(e)
+
+        if self.mode == 'http':
+            return result
+
+        if self.on_fallback:
+            self.on_fallback(url, reason)
+        return self.browser.fetch(url, ready)
+
+    def close(self):
+        self.http.close()
+        self.browser.close()
+        if self.cache:
+            self.cache.close()
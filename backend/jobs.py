@@ -0,0 +1,266 @@
+import collections
+import threading
+import time
+from scraper import KitaScraper
+from coordinator import StateCoordinator
+from checkpoint import CrawlFrontier
+from cancel import token_for
+from driver_pool import DriverPool
+from browser import chromedriver_path, create_driver, pool_key
+from events import LOG_LEVELS
+
+# Statuts d'un job qui ne bougeront plus
+FINISHED = ('completed', 'stopped', 'error')
+
+
+class JobEmitter:
+    """Remplace socketio pour un job: chaque événement porte le `job_id` de son job
+
+    Les logs sont filtrés au niveau `log_level` du job, sans toucher au seuil des autres jobs du bus.
+    """
+
+    def __init__(self, bus, job_id, log_level='info'):
+        self.bus = bus
+        self.job_id = job_id
+        self.log_level = log_level if log_level in LOG_LEVELS else 'info'
+
+    def emit(self, event, data=None, **kwargs):
+        if isinstance(data, dict):
+            data = dict(data, job_id=self.job_id)
+        self.bus.emit(event, data, log_level=self.log_level, **kwargs)
+
+
+class SharedResources:
+    """Ressources de récupération communes à tous les jobs du processus
+
+    Limiteur de débit par hôte (la politesse vaut pour tous les crawls réunis), cache disque
+    et pool de navigateurs: créés par le premier job qui en a besoin, réutilisés ensuite
+    par les jobs aux mêmes réglages.
+    """
+
+    def __init__(self, metrics=None):
+        self.metrics = metrics
+        self.lock = threading.Lock()
+        self.items = {}
+
+    def get(self, key, factory):
+        """Ressource `key`, créée par `factory(metrics)` au premier appel
+
+        La clé porte les réglages dont dépend la ressource (débit, navigateur, cache): un job aux
+        réglages différents obtient la sienne. Les rappels propres à un job (journaux, lancement
+        d'un navigateur) sont passés à chaque usage, jamais à la construction.
+        """
+        with self.lock:
+            if key not in self.items:
+                self.items[key] = factory(self.metrics)
+            return self.items[key]
+
+    def close(self):
+        with self.lock:
+            items, self.items = self.items, {}
+        for item in items.values():
+            item.close()
+
+
+class Job:
+    def __init__(self, job_id, states, settings):
+        self.job_id = job_id
+        self.states = states
+        self.settings = settings
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.thread = None
+        self.state = {
+            'status': 'queued',
+            'progress': 0,
+            'current_task': '',
+            'stats': {'cities': 0, 'kitas': 0, 'errors': 0},
+            'should_stop': False,
+            'should_pause': False,
+            'job_id': job_id
+        }
+        self.cancel = token_for(self.state)
+
+    def info(self):
+        return {
+            'job_id': self.job_id,
+            'states': self.states,
+            'status': self.state['status'],
+            'progress': self.state['progress'],
+            'current_task': self.state['current_task'],
+            'stats': self.state['stats'],
+            'work': self.state.get('work'),
+            'summary': self.state.get('summary'),
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobManager:
+    """Jobs de scraping identifiés, file d'attente et nombre de jobs simultanés borné
+
+    Chaque job a son propre état (pause / arrêt / progression) et ses fiches dans le store
+    sous son `job_id`; les jobs au-delà de `max_concurrent` attendent leur tour dans la file.
+    """
+
+    def __init__(self, bus, store, metrics=None, max_concurrent=2, history=50):
+        self.bus = bus
+        self.store = store
+        self.metrics = metrics
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.history = history
+        self.shared = SharedResources(metrics)
+        self.lock = threading.Lock()
+        self.jobs = collections.OrderedDict()
+        self.queue = collections.deque()
+        self.running = set()
+        self.warm_browsers = 0
+        self.warm_settings = {}
+
+    def submit(self, job_id, states, settings):
+        """Lancer le job, ou le mettre en file si `max_concurrent` jobs tournent déjà"""
+        job = Job(job_id, states, settings)
+        with self.lock:
+            active = self.jobs.get(job_id)
+            if active and active.state['status'] not in FINISHED:
+                raise ValueError(f'Job {job_id} déjà en cours')
+            self.jobs[job_id] = job
+            self.jobs.move_to_end(job_id)
+            self.queue.append(job)
+            self.forget_finished()
+        self.bus.emit('job_update', job.info())
+        self.schedule()
+        return job
+
+    def schedule(self):
+        """Démarrer les jobs en attente tant qu'il reste des places"""
+        while True:
+            with self.lock:
+                if not self.queue or len(self.running) >= self.max_concurrent:
+                    return
+                job = self.queue.popleft()
+                self.running.add(job.job_id)
+            self.start(job)
+
+    def start(self, job):
+        job.started_at = time.time()
+        emitter = JobEmitter(self.bus, job.job_id, job.settings.get('log_level', 'info'))
+
+        # Le coordinateur relaie ses processus depuis ce même thread
+        if job.settings.get('mode') == 'processes' and len(job.states) > 1:
+            runner = StateCoordinator(job.states, job.settings, emitter, job.state, store=self.store, metrics=self.metrics)
+        else:
+            runner = KitaScraper(job.states, job.settings, emitter, job.state, store=self.store, metrics=self.metrics,
+                                 shared=self.shared)
+
+        def run_job():
+            try:
+                runner.run()
+            finally:
+                if job.state['status'] in ('running', 'paused'):
+                    job.state['status'] = 'stopped' if job.state['should_stop'] else 'error'
+                job.finished_at = time.time()
+                # Statut final du job dans le checkpoint ('completed' ne sera plus repris)
+                if job.settings.get('checkpoint', True):
+                    frontier = CrawlFrontier(job.job_id)
+                    frontier.set_status(job.state['status'])
+                    frontier.close()
+                with self.lock:
+                    self.running.discard(job.job_id)
+                self.bus.emit('job_update', job.info())
+                self.schedule()
+                if self.warm_browsers:
+                    self.keep_warm()
+
+        self.set_status(job, 'running')
+        job.thread = threading.Thread(target=run_job, name=f'job-{job.job_id}', daemon=True)
+        job.thread.start()
+
+    def prewarm(self, settings=None, browsers=0):
+        """Préparer en arrière-plan ce que coûte le premier job: chromedriver résolu, navigateurs lancés
+
+        Les navigateurs démarrés ici forment le pool commun des jobs dont les réglages de navigateur
+        (headless, profil, ...) sont ceux de `settings`; les autres jobs lancent les leurs. Le pool est
+        complété après chaque job (navigateurs recyclés ou plantés) pour éviter un démarrage à froid.
+        """
+        self.warm_settings = dict(settings or {})
+        self.warm_browsers = max(0, int(browsers))
+        threading.Thread(target=self.keep_warm, name='prewarm', daemon=True).start()
+
+    def keep_warm(self):
+        try:
+            start = time.perf_counter()
+            chromedriver_path(self.warm_settings)
+            if not self.warm_browsers:
+                return
+            pool = self.shared.get(pool_key(self.warm_settings), lambda metrics: DriverPool(
+                lambda: create_driver(self.warm_settings),
+                size=self.warm_browsers,
+                max_pages=self.warm_settings.get('driver_max_pages', 100)
+            ))
+            started = pool.warm(self.warm_browsers)
+            if started:
+                print(f"[INFO] 🔥 {started} navigateur(s) prêt(s) en {time.perf_counter() - start:.1f} s")
+        except Exception as e:
+            print(f"[WARNING] Préchauffage des navigateurs impossible: {str(e)}")
+
+    def forget_finished(self):
+        """Oublier les plus anciens jobs terminés au-delà de `history`, fiches du store et dernier état du bus compris
+
+        Un job interrompu reste reprenable: ses fiches sont rechargées depuis son checkpoint.
+        """
+        finished = [job_id for job_id, job in self.jobs.items() if job.state['status'] in FINISHED]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self.jobs[job_id]
+            self.bus.forget(job_id)
+            if self.store:
+                self.store.clear(job_id)
+
+    def get(self, job_id=None):
+        """Job `job_id`, ou par défaut le plus récemment lancé"""
+        with self.lock:
+            if job_id:
+                return self.jobs.get(job_id)
+            return next(reversed(self.jobs.values()), None)
+
+    def list(self):
+        with self.lock:
+            return [job.info() for job in reversed(self.jobs.values())]
+
+    def active_ids(self):
+        """Jobs en file ou en cours"""
+        with self.lock:
+            return [job_id for job_id, job in self.jobs.items() if job.state['status'] not in FINISHED]
+
+    def is_active(self, job_id):
+        job = self.get(job_id)
+        return job is not None and job.state['status'] not in FINISHED
+
+    def set_status(self, job, status):
+        job.state['status'] = status
+        self.bus.emit('status_update', {'status': status, 'job_id': job.job_id})
+        self.bus.emit('job_update', job.info())
+
+    def pause(self, job):
+        if job.state['status'] == 'running':
+            job.cancel.pause()
+            self.set_status(job, 'paused')
+
+    def resume(self, job):
+        if job.state['status'] == 'paused':
+            job.cancel.resume()
+            self.set_status(job, 'running')
+
+    def stop(self, job):
+        """Arrêter un job en cours, ou le retirer de la file s'il n'a pas démarré"""
+        with self.lock:
+            queued = job in self.queue
+            if queued:
+                self.queue.remove(job)
+        job.cancel.stop()
+        if queued:
+            job.finished_at = time.time()
+        if job.state['status'] not in FINISHED:
+            self.set_status(job, 'stopped')
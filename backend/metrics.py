@@ -0,0 +1,190 @@
+import threading
+import time
+from contextlib import contextmanager
+
+PREFIX = 'kita_'
+# Bornes des histogrammes (secondes)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HELP = {
+    'phase_seconds': "Durée de chaque phase du scraping",
+    'fetch_seconds': "Durée des récupérations réseau par moteur",
+    'emit_seconds': "Durée des envois d'événements vers le frontend",
+    'fetch_total': "Pages récupérées par moteur et code HTTP",
+    'fetch_bytes_total': "Octets récupérés par moteur",
+    'cache_total': "Lectures du cache disque (hit / miss)",
+    'fallbacks_total': "Replis HTTP -> Selenium",
+    'retries_total': "Nouvelles tentatives par phase",
+    'timeouts_total': "Attentes expirées (WebDriverWait, pages vides) par phase",
+    'errors_total': "Erreurs par phase",
+    'sleep_seconds_total': "Temps passé dans les pauses fixes, par raison",
+    'rate_limit_wait_seconds_total': "Temps d'attente imposé par la limite de débit",
+    'rate_decreases_total': "Baisses du débit par le contrôleur de politesse, par cause",
+    'duplicates_total': "Kitas déjà vues pendant le run (autre ville ou lettre), écartées",
+    'details_reused_total': "Détails repris de l'index au lieu d'être retéléchargés",
+}
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+        for idx, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[idx] += 1
+                break
+
+    def merge(self, counts, total, count, maximum):
+        self.counts = [a + b for a, b in zip(self.counts, counts)]
+        self.sum += total
+        self.count += count
+        self.max = max(self.max, maximum)
+
+    def quantile(self, q):
+        """Borne supérieure du seau contenant le quantile `q` (approximation Prometheus)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+
+class Metrics:
+    """Compteurs et histogrammes étiquetés, rendus au format texte Prometheus
+
+    Avec un `parent`, chaque mesure est aussi reportée dans le parent: un registre par run
+    pour le résumé de fin, le registre global de l'application pour /api/metrics.
+    """
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    @staticmethod
+    def key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, n=1, **labels):
+        key = self.key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+        if self.parent:
+            self.parent.inc(name, n, **labels)
+
+    def observe(self, name, value, **labels):
+        key = self.key(name, labels)
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+        if self.parent:
+            self.parent.observe(name, value, **labels)
+
+    @contextmanager
+    def time(self, name, **labels):
+        """Mesurer la durée d'un bloc dans l'histogramme `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def dump(self):
+        """Contenu sérialisable (envoyé par les processus workers au coordinateur)"""
+        with self.lock:
+            return {
+                'counters': [(name, dict(labels), value) for (name, labels), value in self.counters.items()],
+                'histograms': [(name, dict(labels), h.counts, h.sum, h.count, h.max)
+                               for (name, labels), h in self.histograms.items()]
+            }
+
+    def merge(self, dump):
+        """Ajouter les mesures d'un autre registre (voir `dump`)"""
+        for name, labels, value in dump['counters']:
+            self.inc(name, value, **labels)
+        for name, labels, counts, total, count, maximum in dump['histograms']:
+            key = self.key(name, labels)
+            with self.lock:
+                if key not in self.histograms:
+                    self.histograms[key] = Histogram()
+                self.histograms[key].merge(counts, total, count, maximum)
+        if self.parent:
+            self.parent.merge({'counters': [], 'histograms': dump['histograms']})
+
+    @staticmethod
+    def format_labels(labels, extra=None):
+        items = list(labels) + list(extra or [])
+        if not items:
+            return ''
+        return '{' + ','.join(f'{k}="{str(v)}"' for k, v in items) + '}'
+
+    def render(self):
+        """Exposition au format texte Prometheus"""
+        lines = []
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+            described = set()
+            for (name, labels), value in counters:
+                if name not in described:
+                    described.add(name)
+                    lines.append(f"# HELP {PREFIX}{name} {HELP.get(name, name)}")
+                    lines.append(f"# TYPE {PREFIX}{name} counter")
+                lines.append(f"{PREFIX}{name}{self.format_labels(labels)} {value}")
+            for (name, labels), h in histograms:
+                if name not in described:
+                    described.add(name)
+                    lines.append(f"# HELP {PREFIX}{name} {HELP.get(name, name)}")
+                    lines.append(f"# TYPE {PREFIX}{name} histogram")
+                cumulative = 0
+                for bound, n in zip(h.buckets, h.counts):
+                    cumulative += n
+                    lines.append(f"{PREFIX}{name}_bucket{self.format_labels(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{PREFIX}{name}_bucket{self.format_labels(labels, [('le', '+Inf')])} {h.count}")
+                lines.append(f"{PREFIX}{name}_sum{self.format_labels(labels)} {round(h.sum, 6)}")
+                lines.append(f"{PREFIX}{name}_count{self.format_labels(labels)} {h.count}")
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """Résumé lisible: durées par histogramme/étiquettes, totaux des compteurs"""
+        with self.lock:
+            timings = {}
+            for (name, labels), h in sorted(self.histograms.items(), key=lambda item: item[0]):
+                label = ','.join(str(v) for _, v in labels)
+                timings[f"{name}[{label}]" if label else name] = {
+                    'count': h.count,
+                    'total': round(h.sum, 3),
+                    'mean': round(h.sum / h.count, 4) if h.count else 0,
+                    'p95': h.quantile(0.95),
+                    'max': round(h.max, 4)
+                }
+            counters = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                label = ','.join(str(v) for _, v in labels)
+                counters[f"{name}[{label}]" if label else name] = round(value, 3)
+        return {'timings': timings, 'counters': counters}
+
+
+def summary_lines(summary):
+    """Lignes de log du résumé de fin de run"""
+    lines = []
+    for name, timing in summary['timings'].items():
+        lines.append(f"  ⏱️ {name}: {timing['count']}× moy. {timing['mean'] * 1000:.0f} ms, "
+                     f"p95 ≤ {timing['p95'] * 1000:.0f} ms, max {timing['max'] * 1000:.0f} ms, total {timing['total']:.1f} s")
+    for name, value in summary['counters'].items():
+        lines.append(f"  🔢 {name}: {value}")
+    return lines
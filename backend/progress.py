@@ -0,0 +1,170 @@
+import collections
+import math
+import threading
+import time
+
+# Fiches par page de liste tant qu'aucune page pleine n'a été vue
+DEFAULT_PER_PAGE = 20
+
+
+class ProgressTracker:
+    """Progression d'un crawl en unités de travail connues à l'avance
+
+    Une unité = une page de liste, ou une page de détail si les détails sont extraits.
+    Le nombre de kitas annoncé par ville ('Ville (123)') donne le travail attendu dès que la
+    liste des villes d'un état est connue, puis la pagination réelle le précise. Les états pas
+    encore listés sont estimés sur la moyenne des états listés. Débits et ETA sont calculés sur
+    une fenêtre glissante, à partir du travail fait pendant ce run (pas de ce qui est repris).
+    """
+
+    def __init__(self, states, details=False, window=60):
+        self.states = list(states)
+        self.details = details
+        self.window = window
+        self.lock = threading.Lock()
+        self.cities = {}
+        self.listed = {}
+        self.finished_states = set()
+        self.per_page = None
+        self.started = time.time()
+        # Compteurs du travail fait pendant ce run, échantillonnés pour les débits
+        self.live = {'pages': 0, 'kitas': 0, 'details': 0}
+        self.samples = collections.deque()
+
+    def add_cities(self, state, cities):
+        """Villes d'un état avec leur nombre de kitas annoncé"""
+        with self.lock:
+            self.listed[state] = [city['link'] for city in cities]
+            for city in cities:
+                self.city(city['link'])['count'] = city.get('count') or 0
+
+    def finish_state(self, state):
+        """État terminé (éventuellement lors d'un run précédent): plus de travail attendu"""
+        with self.lock:
+            self.finished_states.add(state)
+            for link in self.listed.get(state, []):
+                self.cities[link]['done'] = True
+
+    def city(self, link):
+        return self.cities.setdefault(link, {
+            'count': 0, 'pages': None, 'pages_done': 0, 'kitas_done': 0, 'details_done': 0, 'done': False
+        })
+
+    def set_pages(self, link, pages):
+        with self.lock:
+            self.city(link)['pages'] = pages
+
+    def page_done(self, link, kitas, live=True, pages=1):
+        """Une page de liste traitée (`live=False` pour une page reprise du checkpoint)"""
+        with self.lock:
+            city = self.city(link)
+            city['pages_done'] += pages
+            city['kitas_done'] += kitas
+            if live:
+                self.live['pages'] += pages
+                self.live['kitas'] += kitas
+                if kitas and (city['pages'] is None or city['pages_done'] < city['pages']):
+                    # Page non finale: bonne mesure du nombre de fiches par page
+                    self.per_page = max(self.per_page or 0, kitas)
+
+    def detail_done(self, link, n=1, live=True):
+        with self.lock:
+            self.city(link)['details_done'] += n
+            if live:
+                self.live['details'] += n
+
+    def city_done(self, link):
+        """Ville terminée, sautée ou reportée: tout son travail compte comme fait"""
+        with self.lock:
+            if link in self.cities:
+                self.cities[link]['done'] = True
+
+    def city_units(self, city):
+        """(unités attendues, unités faites) pour une ville"""
+        if city['pages'] is not None:
+            pages = city['pages']
+        else:
+            pages = max(1, math.ceil(city['count'] / (self.per_page or DEFAULT_PER_PAGE)))
+        kitas = max(city['count'], city['kitas_done'])
+        total = pages + (kitas if self.details else 0)
+        if city['done']:
+            return total, total
+        return total, min(total, city['pages_done'] + (min(city['details_done'], kitas) if self.details else 0))
+
+    def sample(self, now):
+        """Ajouter un échantillon des compteurs et oublier ceux sortis de la fenêtre"""
+        self.samples.append((now, dict(self.live)))
+        while len(self.samples) > 2 and now - self.samples[0][0] > self.window:
+            self.samples.popleft()
+
+    def rates(self):
+        """Débits (par seconde) sur la fenêtre glissante"""
+        if len(self.samples) < 2:
+            return {key: 0.0 for key in self.live}
+        (t0, first), (t1, last) = self.samples[0], self.samples[-1]
+        elapsed = max(t1 - t0, 1e-6)
+        return {key: (last[key] - first[key]) / elapsed for key in self.live}
+
+    def snapshot(self):
+        """Travail fait / restant, débits et ETA"""
+        now = time.time()
+        with self.lock:
+            self.sample(now)
+            total = done = 0
+            expected_kitas = 0
+            for city in self.cities.values():
+                city_total, city_done = self.city_units(city)
+                total += city_total
+                done += city_done
+                expected_kitas += city['count']
+
+            # États pas encore listés: même travail moyen que les états listés
+            unlisted = [state for state in self.states if state not in self.listed and state not in self.finished_states]
+            if self.listed and unlisted:
+                total += int(total / len(self.listed) * len(unlisted))
+
+            rates = self.rates()
+            units_rate = rates['pages'] + (rates['details'] if self.details else 0)
+
+        known = total > 0
+        if known:
+            progress = done / total * 100
+        else:
+            progress = len(self.finished_states) / max(1, len(self.states)) * 100
+        remaining = max(0, total - done)
+        return {
+            'progress': round(min(progress, 99.9), 1),
+            'done_units': done,
+            'total_units': total,
+            'remaining_units': remaining,
+            'expected_kitas': expected_kitas,
+            'pages_per_s': round(rates['pages'], 2),
+            'kitas_per_s': round(rates['kitas'], 2),
+            'details_per_s': round(rates['details'], 2),
+            'eta_seconds': round(remaining / units_rate) if known and units_rate > 0 else None,
+            'elapsed_seconds': round(now - self.started)
+        }
+
+
+def combine(snapshots):
+    """Agréger les progressions de plusieurs workers (coordinateur multi-processus)"""
+    snapshots = [snapshot for snapshot in snapshots if snapshot]
+    if not snapshots:
+        return None
+    total = sum(snapshot['total_units'] for snapshot in snapshots)
+    done = sum(snapshot['done_units'] for snapshot in snapshots)
+    remaining = sum(snapshot['remaining_units'] for snapshot in snapshots)
+    etas = [snapshot['eta_seconds'] for snapshot in snapshots if snapshot['remaining_units']]
+    return {
+        'progress': round(min(done / total * 100, 99.9), 1) if total else 0,
+        'done_units': done,
+        'total_units': total,
+        'remaining_units': remaining,
+        'expected_kitas': sum(snapshot['expected_kitas'] for snapshot in snapshots),
+        'pages_per_s': round(sum(snapshot['pages_per_s'] for snapshot in snapshots), 2),
+        'kitas_per_s': round(sum(snapshot['kitas_per_s'] for snapshot in snapshots), 2),
+        'details_per_s': round(sum(snapshot['details_per_s'] for snapshot in snapshots), 2),
+        # Les workers avancent en parallèle: le run se termine avec le plus lent
+        'eta_seconds': max(etas) if etas and None not in etas else None,
+        'elapsed_seconds': max(snapshot['elapsed_seconds'] for snapshot in snapshots)
+    }
@@ -0,0 +1,132 @@
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Seau à jetons thread-safe: `rate` requêtes/seconde, rafales jusqu'à `burst`"""
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError("rate doit être > 0")
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, cancel=None):
+        """Bloquer jusqu'à obtenir un jeton (interrompu par l'arrêt de `cancel`)"""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            if cancel:
+                cancel.sleep(wait)
+            else:
+                time.sleep(wait)
+
+
+def backoff(attempt, base=1.0, cap=30.0):
+    """Attente avant la nouvelle tentative n° `attempt` (0, 1, ...): exponentielle avec jitter complet"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class HostRateLimiter:
+    """Un seau à jetons par hôte, partagé par tous les workers"""
+
+    def __init__(self, rate=2.0, burst=2, metrics=None):
+        self.rate = rate
+        self.burst = burst
+        self.metrics = metrics
+        self.buckets = {}
+        self.blocked_until = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.burst)
+            return self.buckets[host]
+
+    def acquire(self, url, cancel=None):
+        start = time.perf_counter()
+        # Hôte en pause (Retry-After, backoff): tous les workers attendent
+        wait = self.blocked_until.get(urlparse(url).netloc, 0) - time.monotonic()
+        if wait > 0:
+            if cancel:
+                cancel.sleep(wait)
+            else:
+                time.sleep(wait)
+        self.bucket(url).acquire(cancel)
+        if self.metrics:
+            self.metrics.inc('rate_limit_wait_seconds_total', time.perf_counter() - start)
+
+    def block(self, url, seconds):
+        """Suspendre les requêtes vers l'hôte de `url` pendant `seconds`"""
+        host = urlparse(url).netloc
+        with self.lock:
+            self.blocked_until[host] = max(self.blocked_until.get(host, 0), time.monotonic() + seconds)
+
+    def report(self, url, status=200, latency=None, error=False, on_change=None):
+        """Réponse observée (sans effet ici: débit fixe)"""
+
+
+class AdaptiveRateLimiter(HostRateLimiter):
+    """Contrôleur de politesse: débit par hôte ajusté en AIMD à partir des réponses observées
+
+    Chaque réponse valide et rapide augmente le débit de `increase` × débit courant (au moins
+    `increase` req/s, jusqu'à `max_rate`): une baisse se rattrape en quelques dizaines de réponses,
+    quel que soit le débit. Un 429, une erreur 5xx, une page d'erreur ou une exception le divise
+    par deux, une réponse HTTP plus lente que `target_latency` le réduit de 20%, au plus une baisse par
+    `cooldown` secondes et jamais sous `min_rate` (par défaut le quart du débit de départ).
+    Une baisse est signalée au `on_change` passé à `report` (celui du job qui l'a causée),
+    à défaut à celui du constructeur.
+    """
+
+    def __init__(self, rate=2.0, burst=2, min_rate=None, max_rate=None, increase=0.05,
+                 target_latency=2.0, cooldown=2.0, metrics=None, on_change=None):
+        super().__init__(rate, burst, metrics)
+        self.min_rate = min(min_rate or rate / 4, rate)
+        self.max_rate = max(max_rate or rate * 2, rate)
+        self.increase = increase
+        self.target_latency = target_latency
+        self.cooldown = cooldown
+        self.on_change = on_change
+        self.decreased_at = {}
+
+    def report(self, url, status=200, latency=None, error=False, on_change=None):
+        bucket = self.bucket(url)
+        if error or status == 429 or status >= 500:
+            self.decrease(url, bucket, 0.5, 'erreur' if error else f"HTTP {status}", on_change)
+        elif latency is not None and latency > self.target_latency:
+            self.decrease(url, bucket, 0.8, f"latence {latency:.1f} s", on_change)
+        elif status < 400:
+            with bucket.lock:
+                bucket.rate = min(self.max_rate, bucket.rate + self.increase * max(1.0, bucket.rate))
+
+    def decrease(self, url, bucket, factor, reason, on_change=None):
+        host = urlparse(url).netloc
+        now = time.monotonic()
+        with self.lock:
+            if now - self.decreased_at.get(host, 0) < self.cooldown:
+                return
+            self.decreased_at[host] = now
+        with bucket.lock:
+            bucket.rate = max(self.min_rate, bucket.rate * factor)
+            rate = bucket.rate
+        if self.metrics:
+            self.metrics.inc('rate_decreases_total', reason=reason.split()[0])
+        on_change = on_change or self.on_change
+        if on_change:
+            on_change(host, rate, reason)
@@ -0,0 +1,61 @@
+import sys
+from store import FIELDS
+
+# Valeurs répétées d'une fiche à l'autre: une seule chaîne en mémoire pour toutes les fiches
+INTERNED = ('state', 'city', 'postal_code')
+
+
+class Kita:
+    """Fiche d'une kita, compacte: attributs à slots (pas de dict par fiche), état / ville / CP internés
+
+    Se manipule comme un dict (`kita['id']`, `kita.get('phone')`, `kita.update(details)`, `dict(kita)`)
+    de l'extraction au stockage; convertie en dict seulement aux bords (événements, JSON, export).
+    """
+
+    __slots__ = tuple(FIELDS)
+
+    def __init__(self, values=None, **fields):
+        for field in FIELDS:
+            setattr(self, field, None)
+        if values:
+            self.update(values)
+        if fields:
+            self.update(fields)
+
+    def __getitem__(self, field):
+        if field not in self.__slots__:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __setitem__(self, field, value):
+        if field not in self.__slots__:
+            raise KeyError(field)
+        if field in INTERNED and isinstance(value, str):
+            value = sys.intern(value)
+        setattr(self, field, value)
+
+    def __contains__(self, field):
+        return field in self.__slots__
+
+    def __repr__(self):
+        return f"Kita(id={self.id!r}, name={self.name!r}, city={self.city!r})"
+
+    def get(self, field, default=None):
+        return getattr(self, field, default) if field in self.__slots__ else default
+
+    def keys(self):
+        return FIELDS
+
+    def update(self, values):
+        for field, value in values.items():
+            self[field] = value
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in FIELDS}
+
+
+def plain(obj):
+    """`default` de json.dumps: une fiche Kita s'écrit comme le dict équivalent"""
+    if isinstance(obj, Kita):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -1,158 +1,447 @@
+import json
 import time
-import requests
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
+import threading
+from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
 import re
 import math
+from fetcher import HttpFetcher, BrowserFetcher, HybridFetcher, has_class
+from browser import create_driver, pool_key
+from ratelimit import HostRateLimiter, AdaptiveRateLimiter, backoff
+from driver_pool import DriverPool
+from cache import PageCache
+from checkpoint import CrawlFrontier, DONE, PENDING
+from delta import CityHistory
+from dedup import KitaIndex
+from events import log_enabled
+from progress import ProgressTracker
+from metrics import Metrics, summary_lines
+from cancel import Cancelled, token_for
+from sitemap import SitemapDiscovery
+from record import Kita
+
+# Mapping exact des états allemands vers leurs slugs URL
+STATE_SLUGS = {
+    'Baden-Württemberg': 'baden-wuerttemberg',
+    'Bayern': 'bayern',
+    'Berlin': 'berlin',
+    'Brandenburg': 'brandenburg',
+    'Bremen': 'bremen',
+    'Hamburg': 'hamburg',
+    'Hessen': 'hessen',
+    'Mecklenburg-Vorpommern': 'mecklenburg-vorpommern',
+    'Niedersachsen': 'niedersachsen',
+    'Nordrhein-Westfalen': 'nordrhein-westfalen',
+    'Rheinland-Pfalz': 'rheinland-pfalz',
+    'Saarland': 'saarland',
+    'Sachsen': 'sachsen',
+    'Sachsen-Anhalt': 'sachsen-anhalt',
+    'Schleswig-Holstein': 'schleswig-holstein',
+    'Thüringen': 'thueringen'
+}
+
+# Pages alphabétiques pour la pagination des villes d'un état
+ALPHABET_PAGES = ['aä', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'ij', 'k', 'l', 'm', 'n', 'oö', 'pq', 'r', 's', 'tuü', 'vw', 'xyz']
+
+# Types schema.org d'un nœud JSON-LD qui décrit la kita elle-même (pas le site, la page ou le fil d'Ariane)
+KITA_TYPES = ('ChildCare', 'Preschool', 'LocalBusiness')
+
+# Présent sur toute fiche, contacts ou non: une fiche sans téléphone ni email n'attend pas le navigateur
+DETAIL_READY = 'h1'
 
 class KitaScraper:
-    def __init__(self, states, settings, socketio, scraping_state):
+    def __init__(self, states, settings, socketio, scraping_state, store=None, metrics=None, shared=None):
         self.states = states
         self.settings = settings
         self.socketio = socketio
         self.state = scraping_state
-        self.driver = None
+        # Pause / arrêt: vérifiés par chaque récupération, attente et nouvelle tentative
+        self.cancel = token_for(scraping_state)
+        self.store = store
+        # Limiteur, cache et navigateurs communs aux jobs du processus (voir jobs.SharedResources)
+        self.shared = shared
+        # Mesures du run, reportées dans le registre global de /api/metrics
+        self.metrics = Metrics(parent=metrics)
+        self.fetcher = None
+        self.driver_pool = None
+        self.frontier = None
+        self.replayed = {}
+        self.history = None
+        self.index = None
+        self.base_url = settings.get('base_url', "https://www.kita.de")
         
-        # Pages alphabétiques pour la pagination
-        self.alphabet_pages = ['aä', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'ij', 'k', 'l', 'm', 'n', 'oö', 'pq', 'r', 's', 'tuü', 'vw', 'xyz']
+        # Pool de workers pour les pages de détail et verrou des statistiques partagées
+        self.rate_limiter = None
+        self.detail_executor = None
+        self.lock = threading.Lock()
+        self.progress = ProgressTracker(states, settings.get('extract_details', False))
+        self.current_state = ''
         
+    def count(self, key, n=1):
+        """Incrémenter une statistique (appelé depuis plusieurs threads)"""
+        with self.lock:
+            self.state['stats'][key] += n
+    
+    def send(self, event, data):
+        """Envoyer un événement au frontend (durée mesurée)"""
+        with self.metrics.time('emit_seconds', event=event):
+            self.socketio.emit(event, data)
+    
+    def sleep(self, seconds, reason):
+        """Pause (backoff avant une nouvelle tentative), comptabilisée par raison"""
+        self.metrics.inc('sleep_seconds_total', seconds, reason=reason)
+        self.cancel.sleep(seconds)
+    
     def emit_log(self, message, level='info'):
-        """Envoyer un log au frontend"""
-        self.socketio.emit('log', {
+        """Envoyer un log au frontend (ignoré sous le niveau `log_level` des paramètres)"""
+        if not log_enabled(level, self.settings.get('log_level', 'info')):
+            return
+        self.send('log', {
             'type': 'log',
             'message': message,
             'level': level
         })
         print(f"[{level.upper()}] {message}")
     
-    def emit_progress(self, progress, task):
-        """Mettre à jour la progression avec plus de précision"""
-        # Calculer le pourcentage global
-        total_progress = 0
-        
-        if self.state['stats']['kitas'] > 0:
-            # Calculer sur la base des kitas trouvées
-            estimated_total = self.state['stats']['kitas'] * (len(self.states) / max(1, len(self.state['data'])))
-            total_progress = min(95, (len(self.state['data']) / max(1, estimated_total)) * 100)
-        else:
-            # Calculer sur la base des états
-            states_progress = (progress / len(self.states)) * 100
-            total_progress = min(95, states_progress)
+    def emit_progress(self, task=None, done=False):
+        """Mettre à jour la progression à partir du travail attendu (pages et détails) et de l'ETA"""
+        if task is not None:
+            self.current_state = task
+        work = self.progress.snapshot()
+        if done:
+            work.update(progress=100, remaining_units=0, eta_seconds=0)
+        processed = self.state['stats']['kitas']
 
-        self.state['progress'] = round(total_progress, 1)
-        self.state['current_task'] = f"{task} ({self.state['stats']['kitas']} kitas)"
+        self.state['progress'] = work['progress']
+        self.state['current_task'] = f"{self.current_state} ({processed} kitas)"
+        self.state['work'] = work
 
         # Émettre plus d'informations pour le frontend
-        self.socketio.emit('progress_update', {
-            'progress': total_progress,
+        self.send('progress_update', {
+            'progress': work['progress'],
             'task': self.state['current_task'],
             'stats': self.state['stats'],
-            'current_state': task,
+            'current_state': self.current_state,
             'total_states': len(self.states),
-            'processed_kitas': len(self.state['data']),
+            'processed_kitas': processed,
+            'work': work
         })
     
     def emit_data(self, kitas):
-        """Envoyer des données au frontend"""
-        self.state['data'].extend(kitas)
-        self.socketio.emit('data', {
+        """Enregistrer les fiches (store indexé, ou liste en mémoire sans store) et les envoyer au frontend"""
+        if self.store:
+            self.store.add(self.state.get('job_id'), kitas)
+        elif 'data' in self.state:
+            self.state['data'].extend(kitas)
+        self.send('data', {
             'type': 'data',
-            'kitas': kitas
+            'kitas': [kita.to_dict() for kita in kitas]
+        })
+    
+    def emit_details(self, kitas):
+        """Envoyer les détails résolus, à fusionner par `id` côté frontend"""
+        detail_fields = ('phone', 'email', 'website', 'description')
+        updates = [dict({'id': kita['id']}, **{f: kita.get(f) for f in detail_fields}) for kita in kitas]
+        if self.store:
+            self.store.update_details(self.state.get('job_id'), updates)
+        self.send('data_update', {
+            'type': 'data_update',
+            'kitas': updates
+        })
+    
+    def emit_city_done(self, city_name, city_link, kitas):
+        """Ville traitée: ses fiches (détails compris) ne changeront plus pendant ce run"""
+        self.send('city_done', {
+            'type': 'city_done',
+            'city': city_name,
+            'link': city_link,
+            'ids': [kita['id'] for kita in kitas]
         })
     
     def emit_stats(self):
         """Envoyer les statistiques"""
-        self.socketio.emit('stats', {
+        self.send('stats', {
             'type': 'stats',
             'stats': self.state['stats']
         })
     
-    def setup_driver(self):
-        """Configurer Selenium WebDriver"""
+    def create_driver(self):
+        """Créer une nouvelle instance Chrome configurée (voir browser.create_driver)"""
+        return create_driver(self.settings)
+    
+    def launch_driver(self):
+        """Fabrique du pool: démarrer un navigateur de plus (au premier besoin)"""
         try:
             self.emit_log("🔧 Configuration du WebDriver...", "info")
-            
-            options = Options()
-            
-            # CORRECTION 1: Désactiver headless pour voir ce qui se passe
-            if self.settings.get('headless', False):
-                options.add_argument("--headless=new")
-            
-            # CORRECTION 2: Options pour éviter les erreurs SSL
-            options.add_argument("--ignore-certificate-errors")
-            options.add_argument("--ignore-ssl-errors")
-            options.add_argument("--allow-insecure-localhost")
-            
-            # Options standards
-            options.add_argument("--no-sandbox")
-            options.add_argument("--disable-dev-shm-usage")
-            options.add_argument("--disable-gpu")
-            options.add_argument("--window-size=1920,1080")
-            options.add_argument("--disable-blink-features=AutomationControlled")
-            
-            # CORRECTION 3: User agent récent et valide
-            options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36")
-            
-            # CORRECTION 4: Désactiver les fonctionnalités qui peuvent bloquer
-            options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            options.add_experimental_option('useAutomationExtension', False)
-            
-            # CORRECTION 5: Préférences pour désactiver les avertissements de sécurité
-            prefs = {
-                "profile.default_content_setting_values.notifications": 2,
-                "credentials_enable_service": False,
-                "profile.password_manager_enabled": False
-            }
-            options.add_experimental_option("prefs", prefs)
-            
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=options)
-            
-            # CORRECTION 6: Supprimer les propriétés webdriver
-            self.driver.execute_cdp_cmd('Network.setUserAgentOverride', {
-                "userAgent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36'
-            })
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            
-            self.emit_log("✅ WebDriver initialisé", "success")
-            return True
+            driver = self.create_driver()
+            self.emit_log(f"✅ WebDriver initialisé (profil {self.settings.get('browser_profile', 'lean')})", "success")
+            return driver
             
         except Exception as e:
             self.emit_log(f"❌ Erreur WebDriver: {str(e)}", "error")
-            return False
+            raise
+    
+    def on_rate_change(self, host, rate, reason):
+        """Journaliser une baisse du débit décidée par le contrôleur de politesse"""
+        self.emit_log(f"      🐢 Débit {host} réduit à {rate:.2f} req/s ({reason})", "warning")
+    
+    def on_driver_recycled(self, reason):
+        """Journaliser le recyclage d'un navigateur du pool"""
+        self.emit_log(f"      ♻️ WebDriver recyclé ({reason})", "warning")
+    
+    def setup_fetcher(self):
+        """Configurer la couche de récupération: HTTP d'abord, Selenium en repli"""
+        mode = self.settings.get('engine', 'auto')
+        workers = self.workers()
+        # Débit de départ: 'rate_limit' (req/s) ou, à défaut, le délai entre requêtes de l'interface
+        rate = self.settings.get('rate_limit') or 1000 / max(1, self.settings.get('delay', 500))
+        
+        def rate_limiter(metrics):
+            if self.settings.get('adaptive_rate', True):
+                return AdaptiveRateLimiter(
+                    rate=rate,
+                    burst=self.settings.get('rate_burst', 2),
+                    min_rate=self.settings.get('min_rate_limit'),
+                    max_rate=self.settings.get('max_rate_limit'),
+                    target_latency=self.settings.get('target_latency', 2.0),
+                    metrics=metrics
+                )
+            return HostRateLimiter(rate=rate, burst=self.settings.get('rate_burst', 2), metrics=metrics)
+        
+        # Les workers de détail empruntent aussi leurs navigateurs au pool
+        browsers = workers
+        if self.settings.get('extract_details', False) or self.settings.get('discovery', 'listing') == 'sitemap':
+            browsers += max(1, int(self.settings.get('detail_workers', 4)))
+        
+        # Navigateurs lancés avec les réglages de ce job; les journaux passent par `launch_driver` à l'emprunt
+        settings = dict(self.settings)
+        
+        def driver_pool(metrics):
+            return DriverPool(
+                lambda: create_driver(settings),
+                size=browsers,
+                max_pages=self.settings.get('driver_max_pages', 100)
+            )
+        
+        def page_cache(metrics):
+            return PageCache(
+                max_bytes=self.settings.get('cache_max_mb', 500) * 1024 * 1024,
+                ttls=self.settings.get('cache_ttl'),
+                metrics=metrics
+            )
+        
+        use_cache = self.settings.get('cache', True)
+        if self.shared:
+            # Partagées entre les jobs aux mêmes réglages de débit, de navigateur ou de cache; le pool grandit au besoin
+            self.rate_limiter = self.shared.get((
+                'rate_limiter', self.settings.get('adaptive_rate', True), rate, self.settings.get('rate_burst', 2),
+                self.settings.get('min_rate_limit'), self.settings.get('max_rate_limit'),
+                self.settings.get('target_latency', 2.0)
+            ), rate_limiter)
+            self.driver_pool = self.shared.get(pool_key(self.settings), driver_pool)
+            self.driver_pool.size = max(self.driver_pool.size, browsers)
+            cache = self.shared.get((
+                'cache', self.settings.get('cache_max_mb', 500),
+                json.dumps(self.settings.get('cache_ttl'), sort_keys=True)
+            ), page_cache) if use_cache else None
+        else:
+            self.rate_limiter = rate_limiter(self.metrics)
+            self.driver_pool = driver_pool(self.metrics)
+            cache = page_cache(self.metrics) if use_cache else None
+        http = HttpFetcher(
+            timeout=self.settings.get('timeout', 30000) / 1000,
+            pool_size=self.settings.get('http_pool_size', max(10, workers + self.settings.get('detail_workers', 4))),
+            rate_limiter=self.rate_limiter,
+            metrics=self.metrics,
+            cancel=self.cancel,
+            on_rate_change=self.on_rate_change
+        )
+        browser = BrowserFetcher(self.driver_pool, timeout=10, rate_limiter=self.rate_limiter, metrics=self.metrics,
+                                 cancel=self.cancel, launch=self.launch_driver, on_recycle=self.on_driver_recycled,
+                                 on_rate_change=self.on_rate_change)
+        self.fetcher = HybridFetcher(http, browser, mode, on_fallback=self.on_fetch_fallback, cache=cache)
+        self.emit_log(f"🔧 Moteur de récupération: {mode}{' + cache disque' if cache else ''}", "info")
+    
+    def setup_detail_pool(self):
+        """Créer le pool de workers qui vident la file des pages de détail"""
+        workers = max(1, int(self.settings.get('detail_workers', 4)))
+        self.detail_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='detail')
+        self.emit_log(f"🧵 {workers} worker(s) de détail, {self.rate_limiter.rate:.2f} req/s par hôte au départ", "info")
+    
+    def close_detail_pool(self):
+        """Arrêter les workers de détail"""
+        if self.detail_executor:
+            self.detail_executor.shutdown(wait=True, cancel_futures=True)
+            self.detail_executor = None
+    
+    def resolve_details(self, kitas, city_link=None):
+        """Extraire les détails en parallèle et les fusionner dans les fiches par `id`
+
+        Retourne les fiches effectivement résolues (pas celles sautées après un arrêt).
+        """
+        if not kitas:
+            return []
+        
+        def work(kita_url):
+            if self.cancel.cancelled:
+                return None
+            with self.metrics.time('phase_seconds', phase='detail'):
+                details = self.extract_detail_info(kita_url)
+            self.progress.detail_done(city_link)
+            return details
+        
+        # Une seule extraction par id, même si la kita apparaît deux fois sur la page
+        futures = {}
+        for kita in kitas:
+            if kita['id'] not in futures:
+                futures[kita['id']] = self.detail_executor.submit(work, kita['url'])
+        
+        details_by_id = {}
+        for kita_id, future in futures.items():
+            try:
+                details = future.result()
+                if details is not None:
+                    details_by_id[kita_id] = details
+            except Cancelled:
+                # Arrêt pendant l'extraction: les détails déjà résolus sont gardés
+                continue
+            except Exception as e:
+                self.emit_log(f"        ⚠️ Erreur détail {kita_id}: {str(e)}", "warning")
+                self.count('errors')
+                self.metrics.inc('errors_total', phase='detail')
+        
+        resolved = []
+        for kita in kitas:
+            if kita['id'] in details_by_id:
+                kita.update(details_by_id[kita['id']])
+                resolved.append(kita)
+        return resolved
+    
+    def setup_checkpoint(self):
+        """Ouvrir la frontière de crawl du job (reprise possible après un crash)"""
+        job_id = self.state.get('job_id')
+        if job_id and self.settings.get('checkpoint', True):
+            self.frontier = CrawlFrontier(job_id)
+            self.emit_log(f"💾 Checkpoint du job {job_id}", "info")
+    
+    def checkpoint_get(self, kind, key):
+        if not self.frontier:
+            return None, None
+        return self.frontier.get(kind, key)
+    
+    def checkpoint_done(self, kind, key):
+        return self.checkpoint_get(kind, key)[0] == DONE
+    
+    def checkpoint(self, kind, key, payload=None, state=None, status=DONE):
+        if self.frontier:
+            self.frontier.save(kind, key, status, payload, state)
+    
+    def checkpoint_details(self, kitas, state=None):
+        if self.frontier and kitas:
+            detail_fields = ('phone', 'email', 'website', 'description')
+            self.frontier.complete_many('detail', [
+                (kita['url'], {'url': kita['url'], 'details': {f: kita.get(f) for f in detail_fields}})
+                for kita in kitas
+            ], state)
+    
+    def replay_checkpoint(self):
+        """Recharger les fiches déjà collectées par un run précédent du même job"""
+        if not self.frontier:
+            return
+        records = [Kita(record) for record in self.frontier.records(self.states)]
+        if not records:
+            return
+        self.replayed = {record['url']: record for record in records}
+        self.emit_log(f"♻️ Reprise: {len(records)} kitas déjà collectées rechargées depuis le checkpoint", "info")
+        for start in range(0, len(records), 500):
+            self.emit_data(records[start:start + 500])
+        self.count('kitas', len(records))
+        self.count('cities', self.frontier.done_count('city', self.states))
+        self.emit_stats()
+    
+    def setup_history(self):
+        """Historique par ville: toujours alimenté, utilisé pour sauter les villes en mode incrémental"""
+        if self.settings.get('history', True) or self.settings.get('incremental', False):
+            self.history = CityHistory()
+        if self.settings.get('incremental', False):
+            self.emit_log(f"📈 Mode incrémental: villes inchangées depuis moins de {self.settings.get('max_city_age_days', 7)} jour(s) reportées", "info")
+    
+    def setup_index(self):
+        """Index des ids: une kita vue sous plusieurs villes n'est gardée qu'une fois"""
+        if self.settings.get('dedup', True):
+            self.index = KitaIndex(max_age_days=self.settings.get('detail_max_age_days', 30))
+            if self.replayed:
+                self.index.mark(self.replayed.values())
+    
+    def unique(self, kitas):
+        """Écarter les kitas déjà collectées pendant ce run (sous une autre ville ou lettre)"""
+        if not self.index or not kitas:
+            return kitas
+        fresh = self.index.claim(kitas)
+        if len(fresh) < len(kitas):
+            self.metrics.inc('duplicates_total', len(kitas) - len(fresh))
+        self.index.touch(fresh)
+        return fresh
+    
+    def reuse_details(self, kitas):
+        """Appliquer les détails récents de l'index; retourne les fiches qui restent à extraire"""
+        if not self.index:
+            return kitas
+        known = self.index.fresh_details(kitas)
+        if not known:
+            return kitas
+        reused = []
+        for kita in kitas:
+            if kita['id'] in known:
+                kita.update(known[kita['id']])
+                reused.append(kita)
+        self.metrics.inc('details_reused_total', len(reused))
+        self.emit_log(f"    ♻️ {len(reused)} détail(s) repris de l'index (extraits il y a moins de {self.settings.get('detail_max_age_days', 30)} jour(s))", "info")
+        self.emit_details(reused)
+        return [kita for kita in kitas if kita['id'] not in known]
+    
+    def carry_forward(self, city_info):
+        """Reporter les fiches du dernier crawl d'une ville inchangée"""
+        kitas = self.unique([Kita(record) for record in self.history.records(city_info['link'])])
+        self.progress.city_done(city_info['link'])
+        self.emit_log(f"    ⏭️ {city_info['name']} inchangée ({len(kitas)} kitas reportées)", "info")
+        if kitas:
+            self.emit_data(kitas)
+            self.count('kitas', len(kitas))
+            self.count('cities')
+            self.emit_city_done(city_info['name'], city_info['link'], kitas)
+    
+    def stopped(self):
+        """Fin après un arrêt: le travail en cours est abandonné, ce qui est collecté est gardé"""
+        self.emit_log(f"⏹️ Scraping arrêté: {self.state['stats']['kitas']} kitas conservées", "warning")
+        self.state['status'] = 'stopped'
+        self.emit_stats()
+        self.send('status_update', {'status': 'stopped'})
+        self.emit_progress("Arrêté")
+    
+    def log_summary(self):
+        """Résumé des mesures du run: durées par phase, récupérations, pauses, tentatives"""
+        summary = self.metrics.summary()
+        self.state['summary'] = summary
+        if summary['timings'] or summary['counters']:
+            self.emit_log("📈 Mesures du run:", "info")
+            for line in summary_lines(summary):
+                self.emit_log(line, "info")
+    
+    def workers(self):
+        """Nombre de navigateurs / villes traitées en parallèle"""
+        return max(1, int(self.settings.get('workers', 1)))
+    
+    def on_fetch_fallback(self, url, reason):
+        """Journaliser un repli vers le navigateur"""
+        self.metrics.inc('fallbacks_total')
+        self.emit_log(f"      🧭 Repli Selenium pour {url} ({reason})", "warning")
     
     def get_state_url_slug(self, state):
         """Convertir le nom d'état en slug URL correct pour kita.de"""
-        # Mapping exact des états allemands vers leurs slugs URL
-        state_url_map = {
-            'Baden-Württemberg': 'baden-wuerttemberg',
-            'Bayern': 'bayern',
-            'Berlin': 'berlin',
-            'Brandenburg': 'brandenburg',
-            'Bremen': 'bremen',
-            'Hamburg': 'hamburg',
-            'Hessen': 'hessen',
-            'Mecklenburg-Vorpommern': 'mecklenburg-vorpommern',
-            'Niedersachsen': 'niedersachsen',
-            'Nordrhein-Westfalen': 'nordrhein-westfalen',
-            'Rheinland-Pfalz': 'rheinland-pfalz',
-            'Saarland': 'saarland',
-            'Sachsen': 'sachsen',
-            'Sachsen-Anhalt': 'sachsen-anhalt',
-            'Schleswig-Holstein': 'schleswig-holstein',
-            'Thüringen': 'thueringen'
-        }
-        
         # Retourner le slug ou convertir en minuscules avec translittération de base
-        if state in state_url_map:
-            return state_url_map[state]
+        if state in STATE_SLUGS:
+            return STATE_SLUGS[state]
         
         # Fallback: translittération simple
         slug = state.lower()
@@ -175,398 +464,727 @@ class KitaScraper:
             return city, kitas
         return text.strip(), 0
     
-    def extract_detail_info(self, kita_url):
-        """Extraire les informations détaillées d'une page Kita"""
-        retry_count = 0
+    def empty_details(self):
+        return {
+            'phone': None,
+            'email': None,
+            'website': None,
+            'description': None
+        }
+    
+    def load_detail_page(self, kita_url):
+        """Charger une page de détail: cache frais, sinon revalidation ou téléchargement par le fetcher
+
+        Une page périmée du cache est redemandée en GET conditionnel (ETag / Last-Modified):
+        inchangée (304), elle n'est ni retéléchargée ni rendue par le navigateur. Le navigateur
+        attend `DETAIL_READY` (le titre de la fiche), pas chacun des champs.
+        Trois tentatives; retourne None après le dernier échec.
+        """
         max_retries = 3
         
-        while retry_count < max_retries:
+        for attempt in range(max_retries):
             try:
-                self.driver.get(kita_url)
-                time.sleep(2)  # Attendre le chargement complet
-                
-                detail_info = {
-                    'phone': None,
-                    'email': None,
-                    'website': None,
-                    'description': None
-                }
-                
-                # Extraire l'email 
-                try:
-                    WebDriverWait(self.driver, 5).until(
-                        EC.presence_of_element_located((By.XPATH, "//a[contains(@href, 'mailto:')]"))
-                    )
-                    email_elem = self.driver.find_element(By.XPATH, "//a[contains(@href, 'mailto:')]")
-                    email_text = email_elem.get_attribute('href').replace('mailto:', '')
-                    detail_info['email'] = email_text.strip()
-                    self.emit_log(f"      📧 Email trouvé: {email_text.strip()}", "success")
-                except:
-                    self.emit_log("      ℹ️ Pas d'email trouvé", "info")
-                
-                # Extraire le téléphone 
-                try:
-                    phone_elem = WebDriverWait(self.driver, 5).until(
-                        EC.presence_of_element_located((By.XPATH, "//a[contains(@href, 'tel:')] | //p[contains(@class, 'phone')]"))
-                    )
-                    phone_text = phone_elem.text.replace('Telefon:', '').strip()
-                    if phone_text:
-                        detail_info['phone'] = phone_text
-                        self.emit_log(f"      📞 Téléphone trouvé: {phone_text}", "success")
-                except:
-                    self.emit_log("      ℹ️ Pas de téléphone trouvé", "info")
-                
-                # Extraire le site web 
-                try:
-                    website_elem = WebDriverWait(self.driver, 5).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "p.www a"))
-                    )
-                    website_url = website_elem.get_attribute('href')
-                    if website_url and 'kita.de' not in website_url:
-                        detail_info['website'] = website_url
-                        self.emit_log(f"      🌐 Site web trouvé: {website_url}", "success")
-                except:
-                    self.emit_log("      ℹ️ Pas de site web trouvé", "info")
-                
-                return detail_info
-                
+                page = self.fetcher.fetch(kita_url, ready=DETAIL_READY, page_type='detail')
+                if not page.ok:
+                    raise Exception(f"HTTP {page.status_code}")
+                return page
+            
             except Exception as e:
-                retry_count += 1
-                if retry_count < max_retries:
-                    self.emit_log(f"      ⚠️ Tentative {retry_count}/{max_retries} échouée, nouvelle tentative...", "warning")
-                    time.sleep(2)
+                if attempt < max_retries - 1:
+                    self.emit_log(f"      ⚠️ Tentative {attempt + 1}/{max_retries} échouée, nouvelle tentative...", "warning")
+                    self.metrics.inc('retries_total', phase='detail')
+                    self.sleep(backoff(attempt), 'detail_retry')
                 else:
-                    self.emit_log(f"      ❌ Échec de l'extraction des détails après {max_retries} tentatives", "error")
-                    return {
-                        'phone': None,
-                        'email': None,
-                        'website': None,
-                        'description': None
-                    }
-    
-    def scrape_city_page(self, city_url, page_num, state_name):
-        """Scraper une page d'une ville"""
+                    self.emit_log(f"      ❌ Échec de l'extraction des détails après {max_retries} tentatives: {str(e)}", "error")
+                    self.metrics.inc('errors_total', phase='detail')
+                    return None
+    
+    def extract_detail_info(self, kita_url):
+        """Extraire les informations détaillées d'une page Kita
+
+        La page est chargée une fois (cache, HTTP, navigateur selon le moteur) puis tous les
+        champs sont lus en une passe: un champ absent ne coûte aucune attente.
+        """
+        page = self.load_detail_page(kita_url)
+        if page is None:
+            return self.empty_details()
+        
+        with self.metrics.time('phase_seconds', phase='detail_parse'):
+            detail_info = self.parse_detail_page(page)
+        if page.engine != 'cache':
+            found = [field for field, value in detail_info.items() if value]
+            self.emit_log(f"      🔎 {kita_url.split('/')[-1]}: {', '.join(found) or 'aucun contact'}", "debug")
+        return detail_info
+    
+    def page_url(self, city_url, page_num):
+        return f"{city_url}/p={page_num}" if page_num > 1 else city_url
+    
+    def parse_detail_page(self, page):
+        """Extraire tous les détails d'une page chargée en une passe (liens, blocs de contact, JSON-LD)"""
+        tree = page.tree
+        detail_info = self.empty_details()
+        
+        email = tree.xpath('//a[contains(@href, "mailto:")]/@href')
+        if email:
+            detail_info['email'] = email[0].replace('mailto:', '').split('?')[0].strip()
+        
+        phone_elem = tree.xpath(f'//a[contains(@href, "tel:")] | //p[{has_class("phone")}]')
+        if phone_elem:
+            phone_text = ' '.join(phone_elem[0].text_content().split()).replace('Telefon:', '').strip()
+            if not phone_text and phone_elem[0].get('href'):
+                phone_text = phone_elem[0].get('href').replace('tel:', '').strip()
+            if phone_text:
+                detail_info['phone'] = phone_text
+        
+        website = tree.xpath(f'//p[{has_class("www")}]//a/@href')
+        if website and 'kita.de' not in website[0]:
+            detail_info['website'] = website[0]
+        
+        description = tree.xpath(f'//*[@itemprop="description"] | //*[{has_class("description")}]')
+        if description:
+            detail_info['description'] = ' '.join(description[0].text_content().split()) or None
+        
+        # Données structurées: complètent les champs manquants
+        for field, value in self.parse_json_ld(tree).items():
+            if value and not detail_info.get(field):
+                detail_info[field] = value
+        
+        if not detail_info['description']:
+            meta = tree.xpath('//meta[@name="description"]/@content')
+            if meta and meta[0].strip():
+                detail_info['description'] = meta[0].strip()
+        
+        return detail_info
+    
+    def json_ld_nodes(self, tree):
+        """Objets des blocs JSON-LD (schema.org) de la page, @graph compris"""
+        nodes = []
+        for script in tree.xpath('//script[@type="application/ld+json"]/text()'):
+            try:
+                data = json.loads(script)
+            except ValueError:
+                continue
+            nodes.extend(data if isinstance(data, list) else [data])
+        
+        while nodes:
+            node = nodes.pop(0)
+            if not isinstance(node, dict):
+                continue
+            nodes.extend(node.get('@graph', []))
+            yield node
+    
+    def kita_nodes(self, tree):
+        """Nœuds JSON-LD de la kita: type `KITA_TYPES` ou porteur de l'adresse postale"""
+        for node in self.json_ld_nodes(tree):
+            types = node.get('@type')
+            types = types if isinstance(types, list) else [types]
+            names = {str(t).rsplit('/', 1)[-1].rsplit(':', 1)[-1] for t in types if t}
+            if names.intersection(KITA_TYPES) or isinstance(node.get('address'), dict):
+                yield node
+    
+    def parse_json_ld(self, tree):
+        """Contacts et description de la kita dans les blocs JSON-LD (schema.org) de la page"""
+        found = {}
+        for node in self.kita_nodes(tree):
+            website = node.get('url') or node.get('sameAs')
+            if isinstance(website, list):
+                website = website[0] if website else None
+            for field, value in (
+                ('email', node.get('email')),
+                ('phone', node.get('telephone')),
+                ('website', website if website and 'kita.de' not in website else None),
+                ('description', node.get('description'))
+            ):
+                if isinstance(value, str) and value.strip() and field not in found:
+                    found[field] = value.replace('mailto:', '').strip()
+        return found
+    
+    def parse_profile(self, page, kita_url, state_name):
+        """Fiche complète lue sur la page d'une kita (découverte par sitemap, sans page de liste)
+
+        Nom et adresse viennent du JSON-LD (PostalAddress), à défaut du titre <h1>;
+        les contacts et la description sont lus comme pour les détails.
+        """
+        tree = page.tree
+        name = None
+        address = {}
+        for node in self.kita_nodes(tree):
+            if isinstance(node.get('address'), dict):
+                address = node['address']
+                name = node.get('name')
+                break
+            if not name and isinstance(node.get('name'), str):
+                name = node['name']
+        if not name:
+            h1 = tree.xpath('//h1')
+            name = ' '.join(h1[0].text_content().split()) if h1 else page.title
+        
+        kita = Kita(
+            id=kita_url.rstrip('/').split('/')[-1],
+            name=' '.join(str(name or '').split()),
+            street_address=address.get('streetAddress') or '',
+            postal_code=str(address.get('postalCode') or ''),
+            city=address.get('addressLocality') or '',
+            state=state_name,
+            url=kita_url
+        )
+        kita.update(self.parse_detail_page(page))
+        return kita
+    
+    def split_address(self, address_elem):
+        """Découper le bloc d'adresse (élément lxml) sur les <br>: rue / CP ville / état"""
+        parts = [address_elem.text or '']
+        for child in address_elem:
+            if child.tag == 'br':
+                parts.append('')
+            else:
+                parts[-1] += child.text_content()
+            parts[-1] += child.tail or ''
+        return [' '.join(part.split()) for part in parts]
+    
+    def parse_listing_item(self, item, base_url, state_name):
+        """Fiche de base d'un élément `.media` d'une page de liste (lxml, sans aller-retour navigateur)"""
+        # Nom et lien
+        link_elem = item.xpath('.//h3/a')[0]
+        name = ' '.join(link_elem.text_content().split())
+        kita_href = urljoin(base_url, link_elem.get('href'))
+        kita_id = kita_href.split('/')[-1]
+        
+        # Adresse
+        parts = self.split_address(item.xpath('.//p/small')[0])
+        
+        street = parts[0] if len(parts) >= 1 else ""
+        postal_code = ""
+        city = ""
+        state = state_name
+        
+        if len(parts) >= 2:
+            postal_parts = parts[1].split()
+            if len(postal_parts) >= 1:
+                postal_code = postal_parts[0]
+            if len(postal_parts) > 1:
+                city = " ".join(postal_parts[1:])
+        
+        if len(parts) >= 3:
+            state = parts[2]
+        
+        return Kita(
+            id=kita_id,
+            name=name,
+            street_address=street,
+            postal_code=postal_code,
+            city=city,
+            state=state,
+            url=kita_href
+        )
+    
+    def page_count(self, page):
+        """Nombre de pages d'une ville, lu sur le dernier lien de la pagination"""
+        hrefs = page.tree.xpath(f'//ul[{has_class("pagination")}]//a/@href')
+        if hrefs:
+            match = re.search(r'p=(\d+)', hrefs[-1])
+            if match:
+                return int(match.group(1))
+        return 1
+    
+    def parse_cities(self, soup):
+        """Extraire la liste des villes d'une page d'état ou d'une page alphabétique"""
+        cities = []
+        cities_list = soup.find("ol", class_="cities list-unstyled")
+        if not cities_list:
+            cities_list = soup.find("ul", class_="cities")
+        city_items = cities_list.find_all("li") if cities_list else soup.select(".cities li")
+        
+        for city_item in city_items:
+            city_link_elem = city_item.find("a")
+            if not city_link_elem or not city_link_elem.get("href"):
+                continue
+            
+            city_text = city_item.get_text(" ", strip=True)
+            city_name, kita_count = self.extract_city_and_kitas(city_text)
+            cities.append({
+                'name': city_name,
+                'link': urljoin(self.base_url, city_link_elem.get("href")),
+                'count': kita_count
+            })
+        
+        return cities
+    
+    def scrape_city_page(self, city_url, page_num, state_name, page=None):
+        """Scraper une page d'une ville (`page` permet de réutiliser une page déjà chargée)
+
+        Retourne les fiches nouvelles pour ce run (liste vide si toutes ont déjà été vues ailleurs),
+        ou None si la page n'a pas pu être chargée.
+        """
         kitas = []
         
         try:
-            page_url = f"{city_url}/p={page_num}" if page_num > 1 else city_url
-            self.driver.get(page_url)
-            time.sleep(self.settings.get('delay', 500) / 1000)
+            page_url = self.page_url(city_url, page_num)
+            if page is None:
+                with self.metrics.time('phase_seconds', phase='listing_page'):
+                    page = self.fetcher.fetch(page_url, ready=".profile_listing", page_type='page')
             
-            # Attendre que le contenu se charge
-            try:
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "profile_listing"))
-                )
-            except TimeoutException:
+            # Tout le HTML de la page en une fois (un seul page_source en mode navigateur), parsé avec lxml
+            parse_start = time.perf_counter()
+            listing = page.tree.xpath(f'//*[{has_class("profile_listing")}]')
+            if not listing:
                 self.emit_log(f"      ⏱️ Timeout page {page_num}", "warning")
-                return kitas
+                self.metrics.inc('timeouts_total', phase='listing_page')
+                self.count('errors')
+                return None
             
-            listing = self.driver.find_element(By.CLASS_NAME, "profile_listing")
-            items = listing.find_elements(By.CLASS_NAME, "media")
+            items = listing[0].xpath(f'.//*[{has_class("media")}]')
             
             self.emit_log(f"      📋 Page {page_num}: {len(items)} kitas", "info")
             
             for item in items:
                 try:
-                    # Nom et lien
-                    link_elem = item.find_element(By.XPATH, ".//h3/a")
-                    name = link_elem.text.strip()
-                    kita_href = link_elem.get_attribute('href')
-                    kita_id = kita_href.split('/')[-1]
-                    
-                    # Adresse
-                    address_elem = item.find_element(By.XPATH, ".//p/small")
-                    address_html = address_elem.get_attribute('innerHTML')
-                    parts = [p.strip() for p in address_html.split("<br>")]
-                    
-                    street = parts[0] if len(parts) >= 1 else ""
-                    postal_code = ""
-                    city = ""
-                    state = state_name
-                    
-                    if len(parts) >= 2:
-                        postal_parts = parts[1].strip().split()
-                        if len(postal_parts) >= 1:
-                            postal_code = postal_parts[0]
-                        if len(postal_parts) > 1:
-                            city = " ".join(postal_parts[1:])
-                    
-                    if len(parts) >= 3:
-                        state = parts[2].strip()
-                    
-                    # Créer l'objet
-                    kita_data = {
-                        'id': kita_id,
-                        'name': name,
-                        'street_address': street,
-                        'postal_code': postal_code,
-                        'city': city,
-                        'state': state,
-                        'url': kita_href,
-                        'phone': None,
-                        'email': None,
-                        'website': None,
-                        'description': None
-                    }
-                    
-                    # Extraire les détails si demandé
-                    if self.settings.get('extract_details', False):
-                        detail_info = self.extract_detail_info(kita_href)
-                        kita_data.update(detail_info)
-                        # Retour à la page de listing
-                        self.driver.get(page_url)
-                        time.sleep(0.5)
-                    
-                    kitas.append(kita_data)
-                    self.state['stats']['kitas'] += 1
+                    kitas.append(self.parse_listing_item(item, page.final_url, state_name))
                 
                 except Exception as e:
                     self.emit_log(f"        ⚠️ Erreur élément: {str(e)}", "warning")
-                    self.state['stats']['errors'] += 1
+                    self.count('errors')
+                    self.metrics.inc('errors_total', phase='listing_parse')
+            
+            self.metrics.observe('phase_seconds', time.perf_counter() - parse_start, phase='listing_parse')
+            
+            # Avant toute extraction de détails: une kita déjà vue ailleurs n'est pas reprise
+            kitas = self.unique(kitas)
+            self.count('kitas', len(kitas))
         
         except Exception as e:
             self.emit_log(f"      ❌ Erreur page {page_num}: {str(e)}", "error")
+            self.metrics.inc('errors_total', phase='listing_page')
+            self.count('errors')
+            return None
         
         return kitas
     
-    def scrape_city(self, state_url, city_name, city_link):
-        """Scraper toutes les pages d'une ville"""
+    def scrape_city(self, state_url, city_name, city_link, state_name=None, kita_count=None):
+        """Scraper toutes les pages d'une ville; retourne True si la ville est terminée
+
+        Phase 1: collecte des listes, fiches de base envoyées page par page.
+        Phase 2: résolution des détails à partir des URLs collectées, sans revenir aux listes.
+        Les pages et détails déjà enregistrés dans le checkpoint ne sont pas retéléchargés.
+        """
         try:
-            self.emit_log(f"    🏙️ {city_name}", "info")
-            
-            # Aller sur la première page de la ville
-            self.driver.get(city_link)
-            time.sleep(1)
+            status, progress = self.checkpoint_get('city', city_link)
+            if status == DONE:
+                self.progress.city_done(city_link)
+                self.emit_log(f"    ⏭️ {city_name} (déjà terminée)", "info")
+                return True
             
-            # Obtenir le nombre de pages
-            html = self.driver.page_source
-            soup = BeautifulSoup(html, 'html.parser')
+            self.emit_log(f"    🏙️ {city_name}", "info")
             
-            pages = 1
-            pagination = soup.find("ul", class_="pagination list-unstyled")
-            if pagination:
-                page_links = pagination.find_all("a")
-                if page_links:
-                    try:
-                        last_href = page_links[-1].get("href", "")
-                        match = re.search(r'p=(\d+)', last_href)
-                        if match:
-                            pages = int(match.group(1))
-                    except:
-                        pass
+            pages = (progress or {}).get('pages')
+            first_page = None
+            if pages is None or not self.checkpoint_done('page', city_link):
+                # Aller sur la première page de la ville
+                with self.metrics.time('phase_seconds', phase='city_page'):
+                    first_page = self.fetcher.fetch(city_link, ready=".profile_listing", page_type='city')
+                
+                # Obtenir le nombre de pages
+                pages = self.page_count(first_page)
+                
+                self.checkpoint('city', city_link, {'name': city_name, 'pages': pages}, state_name, status=PENDING)
             
+            self.progress.set_pages(city_link, pages)
             self.emit_log(f"      📖 {pages} page(s) à traiter", "info")
             
+            # Phase 1: collecte des listes
             all_kitas = []
+            missing = 0
             for page in range(1, pages + 1):
-                if self.state['should_stop']:
+                if self.cancel.cancelled:
                     break
+                self.cancel.check()
                 
-                while self.state['should_pause']:
-                    time.sleep(0.5)
+                page_url = self.page_url(city_link, page)
+                status, done_kitas = self.checkpoint_get('page', page_url)
+                if status == DONE:
+                    # Fiches déjà rechargées au démarrage: reprendre les mêmes objets
+                    all_kitas.extend(self.replayed.get(kita['url']) or Kita(kita) for kita in done_kitas)
+                    self.progress.page_done(city_link, len(done_kitas), live=False)
+                    continue
                 
-                kitas = self.scrape_city_page(city_link, page, state_url.split('/')[-1])
+                # La première page est déjà chargée: pas de second chargement
+                kitas = self.scrape_city_page(city_link, page, state_url.split('/')[-1],
+                                              page=first_page if page == 1 else None)
+                if kitas is None:
+                    missing += 1
+                    kitas = []
+                else:
+                    # Page chargée, même sans fiche nouvelle (toutes déjà vues sous une autre ville)
+                    if kitas:
+                        self.emit_data(kitas)
+                    self.checkpoint('page', page_url, kitas, state_name)
                 all_kitas.extend(kitas)
+                self.progress.page_done(city_link, len(kitas))
+                self.emit_progress()
             
             if all_kitas:
                 self.emit_log(f"    ✅ {len(all_kitas)} kitas collectées", "success")
-                self.emit_data(all_kitas)
-                self.state['stats']['cities'] += 1
             
-            return all_kitas
+            # Phase 2: détails depuis la liste d'URLs, fusionnés par id dans les fiches déjà envoyées
+            if all_kitas and self.settings.get('extract_details', False) and not self.cancel.cancelled:
+                pending = [kita for kita in all_kitas if not self.checkpoint_done('detail', kita['url'])]
+                self.progress.detail_done(city_link, len(all_kitas) - len(pending), live=False)
+                if pending:
+                    fetch = self.reuse_details(pending)
+                    self.progress.detail_done(city_link, len(pending) - len(fetch), live=False)
+                    resolved = []
+                    if fetch:
+                        self.emit_log(f"    🔎 Résolution des détails ({len(fetch)} URLs)", "info")
+                        resolved = self.resolve_details(fetch, city_link)
+                        self.emit_details(resolved)
+                        if self.index:
+                            self.index.record_details(resolved)
+                    fetch_ids = {kita['id'] for kita in fetch}
+                    resolved += [kita for kita in pending if kita['id'] not in fetch_ids]
+                    self.checkpoint_details(resolved, state_name)
+                    missing += len(pending) - len(resolved)
+                    self.emit_progress()
+            
+            # La ville n'est terminée que si aucune page ni aucun détail ne manque
+            finished = not self.cancel.cancelled and missing == 0
+            if finished:
+                if all_kitas:
+                    self.count('cities')
+                self.checkpoint('city', city_link, {'name': city_name, 'pages': pages}, state_name)
+                self.progress.city_done(city_link)
+                if self.history:
+                    self.history.record(state_name, {'link': city_link, 'name': city_name, 'count': kita_count},
+                                        all_kitas, self.settings.get('extract_details', False))
+            
+            self.emit_city_done(city_name, city_link, all_kitas)
+            return finished
             
         except Exception as e:
             self.emit_log(f"    ❌ Erreur ville {city_name}: {str(e)}", "error")
-            self.state['stats']['errors'] += 1
-            return []
+            self.count('errors')
+            self.metrics.inc('errors_total', phase='city_page')
+            return False
     
-    def scrape_state(self, state):
-        """Scraper un état complet"""
-        try:
-            base_url = "https://www.kita.de/kitas"
-            state_slug = self.get_state_url_slug(state)
-            state_url = f"{base_url}/{state_slug}"
+    def list_cities(self, state, state_url):
+        """Construire la liste des villes d'un état (page d'état puis pages alphabétiques)"""
+        # Charger la page avec retry et vérification
+        max_retries = 3
+        page = None
+        for attempt in range(max_retries):
+            try:
+                self.emit_log(f"  🌐 Chargement {state_url} (tentative {attempt + 1}/{max_retries})", "info")
+                # Le fetcher attend la liste des villes ou la pagination et bascule sur Selenium si besoin
+                with self.metrics.time('phase_seconds', phase='state_page'):
+                    page = self.fetcher.fetch(state_url, ready=".cities li a, .pagination_char", page_type='state')
+                
+                # Vérifier qu'on n'est pas sur une page d'erreur
+                page_title = page.title
+                
+                self.emit_log(f"  📄 Titre: {page_title} [{page.engine}]", "info")
+                self.emit_log(f"  🔗 URL: {page.final_url}", "info")
+                
+                # Vérifier si c'est une page d'erreur
+                if "Privacy error" in page_title or "SSL" in page_title or "certificate" in page_title.lower():
+                    self.emit_log(f"  ⚠️ Page d'erreur SSL détectée, nouvelle tentative...", "warning")
+                    self.metrics.inc('retries_total', phase='state_page')
+                    self.rate_limiter.report(state_url, error=True, on_change=self.on_rate_change)
+                    self.sleep(backoff(attempt, base=2.0), 'state_retry')
+                    continue
+                
+                # Vérifier si on a du contenu valide
+                html = page.html
+                if not page.ok or "ssl-enhanced-protection-message" in html or "error-code" in html:
+                    self.emit_log(f"  ⚠️ HTML d'erreur détecté (HTTP {page.status_code}), nouvelle tentative...", "warning")
+                    self.metrics.inc('retries_total', phase='state_page')
+                    self.rate_limiter.report(state_url, error=True, on_change=self.on_rate_change)
+                    self.sleep(backoff(attempt, base=2.0), 'state_retry')
+                    continue
+                
+                # Si on arrive ici, la page semble OK
+                self.emit_log(f"  ✅ Page chargée avec succès", "success")
+                break
+                
+            except Exception as e:
+                self.emit_log(f"  ❌ Erreur tentative {attempt + 1}: {str(e)}", "error")
+                if attempt == max_retries - 1:
+                    raise
+                self.metrics.inc('retries_total', phase='state_page')
+                self.sleep(backoff(attempt, base=2.0), 'state_retry')
+        
+        if not page.has(".cities li a, .pagination_char"):
+            self.emit_log("  ⚠️ Timeout - tentative de scraping quand même", "warning")
+        
+        soup = page.soup
+        
+        self.emit_log(f"  📄 HTML chargé ({len(page.html)} caractères)", "info")
+        
+        # Vérifier si pagination alphabétique existe
+        pagination_alpha = soup.find("ol", class_="pagination_char list-unstyled")
+        
+        all_cities = []
+        
+        if pagination_alpha:
+            # AVEC pagination alphabétique
+            self.emit_log("  📚 Pagination alphabétique détectée", "info")
             
-            self.emit_log(f"\n{'='*60}", "info")
-            self.emit_log(f"📂 ÉTAT: {state}", "info")
-            self.emit_log(f"{'='*60}", "info")
+            for letter in ALPHABET_PAGES:
+                if self.cancel.cancelled:
+                    break
+                
+                alpha_url = f"{state_url}/c={letter}"
+                self.emit_log(f"\n  📖 Lettre: {letter}", "info")
+                
+                status, cities = self.checkpoint_get('letter', alpha_url)
+                if status == DONE:
+                    all_cities.extend(cities)
+                    continue
+                
+                with self.metrics.time('phase_seconds', phase='letter_page'):
+                    alpha_page = self.fetcher.fetch(alpha_url, ready=".cities", page_type='letter')
+                if not alpha_page.has(".cities"):
+                    self.emit_log(f"    ⏱️ Timeout lettre {letter}", "warning")
+                    self.metrics.inc('timeouts_total', phase='letter_page')
+                    continue
+                
+                # Trouver les villes
+                cities = self.parse_cities(alpha_page.soup)
+                self.emit_log(f"    🏙️ {len(cities)} ville(s) trouvée(s)", "info")
+                all_cities.extend(cities)
+                self.checkpoint('letter', alpha_url, cities, state)
+        
+        else:
+            # SANS pagination alphabétique
+            self.emit_log("  📍 Pas de pagination alphabétique", "info")
             
-            # Charger la page avec retry et vérification
-            max_retries = 3
-            for attempt in range(max_retries):
+            cities = self.parse_cities(soup)
+            if cities:
+                self.emit_log(f"  🏙️ {len(cities)} ville(s) trouvée(s) [{page.engine}]", "info")
+                all_cities.extend(cities)
+            else:
+                self.emit_log("  ❌ Aucune ville trouvée!", "error")
+                self.count('errors')
+                # HTML pour debug (le navigateur a déjà été rendu au pool)
                 try:
-                    self.emit_log(f"  🌐 Chargement {state_url} (tentative {attempt + 1}/{max_retries})", "info")
-                    self.driver.get(state_url)
-                    
-                    # Vérifier qu'on n'est pas sur une page d'erreur
-                    time.sleep(2)
-                    page_title = self.driver.title
-                    current_url = self.driver.current_url
-                    
-                    self.emit_log(f"  📄 Titre: {page_title}", "info")
-                    self.emit_log(f"  🔗 URL: {current_url}", "info")
-                    
-                    # Vérifier si c'est une page d'erreur
-                    if "Privacy error" in page_title or "SSL" in page_title or "certificate" in page_title.lower():
-                        self.emit_log(f"  ⚠️ Page d'erreur SSL détectée, nouvelle tentative...", "warning")
-                        time.sleep(3)
-                        continue
-                    
-                    # Vérifier si on a du contenu valide
-                    html = self.driver.page_source
-                    if "ssl-enhanced-protection-message" in html or "error-code" in html:
-                        self.emit_log(f"  ⚠️ HTML d'erreur détecté, nouvelle tentative...", "warning")
-                        time.sleep(3)
-                        continue
-                    
-                    # Si on arrive ici, la page semble OK
-                    self.emit_log(f"  ✅ Page chargée avec succès", "success")
-                    break
-                    
-                except Exception as e:
-                    self.emit_log(f"  ❌ Erreur tentative {attempt + 1}: {str(e)}", "error")
-                    if attempt == max_retries - 1:
-                        raise
-                    time.sleep(3)
+                    debug_path = f"debug_page_{state}.html"
+                    with open(debug_path, 'w', encoding='utf-8') as f:
+                        f.write(page.html)
+                    self.emit_log(f"  📸 HTML sauvegardé: {debug_path}", "info")
+                except:
+                    pass
+        
+        
+        return all_cities
+    
+    def discover_sitemap(self):
+        """Fiches des états sélectionnés lues dans les sitemaps: {état: [(url, lastmod), ...]}
+
+        Un état sans fiche attribuée (ou un sitemap illisible) garde le parcours des listes.
+        """
+        slugs = {self.get_state_url_slug(state): state for state in self.states}
+        discovery = SitemapDiscovery(
+            self.base_url,
+            set(STATE_SLUGS.values()) | set(slugs),
+            self.fetcher.http.open_stream,
+            lambda url: self.fetcher.http.fetch(url).html,
+            selected=slugs
+        )
+        try:
+            with self.metrics.time('phase_seconds', phase='sitemap'):
+                found = discovery.discover()
+        except Cancelled:
+            raise
+        except Exception as e:
+            self.emit_log(f"⚠️ Sitemaps illisibles ({str(e)}), parcours des listes", "warning")
+            self.metrics.inc('errors_total', phase='sitemap')
+            return {}
+        
+        entries = {slugs[slug]: urls for slug, urls in found.items() if urls}
+        total = sum(len(urls) for urls in entries.values())
+        skipped = f", {discovery.skipped} sitemap(s) d'autres états ignoré(s)" if discovery.skipped else ""
+        self.emit_log(f"🗺️ {discovery.sitemaps} sitemap(s) lu(s): {total} fiche(s) pour {len(entries)} état(s){skipped}", "info")
+        if discovery.unattributed:
+            self.emit_log(f"  ⚠️ {discovery.unattributed} fiche(s) sans état reconnaissable ignorée(s)", "warning")
+        return entries
+    
+    def scrape_state_sitemap(self, state, entries):
+        """Scraper un état à partir de ses URLs de fiche, sans pages de villes ni de liste
+
+        Chaque fiche est lue en une page (nom, adresse, contacts) par les workers de détail.
+        Les fiches extraites après leur `lastmod` sont reprises de l'index sans téléchargement.
+        Retourne True si l'état est terminé (toutes ses fiches lues).
+        """
+        link = f"sitemap:{state}"
+        try:
+            self.emit_log(f"\n{'='*60}", "info")
+            self.emit_log(f"🗺️ ÉTAT: {state} ({len(entries)} fiches du sitemap)", "info")
+            self.emit_log(f"{'='*60}", "info")
             
-            # ATTENDRE que le contenu JavaScript se charge
-            self.emit_log("  ⏳ Attente du chargement JavaScript...", "info")
-            try:
-                # Attendre que la liste des villes apparaisse (jusqu'à 20 secondes)
-                WebDriverWait(self.driver, 20).until(
-                    lambda driver: len(driver.find_elements(By.CSS_SELECTOR, ".cities li a")) > 0 or 
-                                 driver.find_element(By.CSS_SELECTOR, ".pagination_char")
-                )
-                time.sleep(2)
-                self.emit_log("  ✅ Contenu chargé", "success")
-            except TimeoutException:
-                self.emit_log("  ⚠️ Timeout - tentative de scraping quand même", "warning")
+            if self.checkpoint_done('state', state):
+                self.progress.finish_state(state)
+                self.emit_log("  ⏭️ État déjà terminé (reprise)", "info")
+                return True
             
-            html = self.driver.page_source
-            soup = BeautifulSoup(html, 'html.parser')
+            self.progress.add_cities(state, [{'link': link, 'count': len(entries)}])
+            self.progress.set_pages(link, len(entries))
             
-            self.emit_log(f"  📄 HTML chargé ({len(html)} caractères)", "info")
+            # Fiches déjà collectées par un run précédent du job (rechargées au démarrage)
+            pending = [(url, lastmod) for url, lastmod in entries if url not in self.replayed]
+            done = len(entries) - len(pending)
             
-            # Vérifier si pagination alphabétique existe
-            pagination_alpha = soup.find("ol", class_="pagination_char list-unstyled")
+            known = self.index.fresh_records(pending) if self.index else {}
+            if known:
+                kitas = self.unique([Kita(record) for record in known.values()])
+                self.metrics.inc('details_reused_total', len(known))
+                self.emit_log(f"  ♻️ {len(known)} fiche(s) inchangée(s) depuis leur dernière extraction, reprise(s) de l'index", "info")
+                if kitas:
+                    self.emit_data(kitas)
+                    self.count('kitas', len(kitas))
+                    self.checkpoint('page', f"{link}#{kitas[0]['url']}", kitas, state)
+                    self.emit_city_done(state, link, kitas)
+                pending = [(url, lastmod) for url, lastmod in pending
+                           if url.rstrip('/').split('/')[-1] not in known]
+                done += len(known)
+            self.progress.page_done(link, 0, live=False, pages=done)
+            self.progress.detail_done(link, done, live=False)
             
-            all_cities = []
+            def work(kita_url):
+                if self.cancel.cancelled:
+                    return None
+                with self.metrics.time('phase_seconds', phase='detail'):
+                    page = self.load_detail_page(kita_url)
+                    kita = self.parse_profile(page, kita_url, state) if page is not None else None
+                self.progress.page_done(link, 0)
+                self.progress.detail_done(link)
+                return kita
             
-            if pagination_alpha:
-                # AVEC pagination alphabétique
-                self.emit_log("  📚 Pagination alphabétique détectée", "info")
-                
-                for letter in self.alphabet_pages:
-                    if self.state['should_stop']:
-                        break
-                    
-                    alpha_url = f"{state_url}/c={letter}"
-                    self.emit_log(f"\n  📖 Lettre: {letter}", "info")
-                    
-                    self.driver.get(alpha_url)
-                    
-                    # Attendre le chargement
+            missing = 0
+            batch_size = max(1, int(self.settings.get('sitemap_batch', 100)))
+            for start in range(0, len(pending), batch_size):
+                if self.cancel.cancelled:
+                    break
+                self.cancel.check()
+                batch = pending[start:start + batch_size]
+                futures = [self.detail_executor.submit(work, url) for url, _ in batch]
+                kitas = []
+                for future in futures:
                     try:
-                        WebDriverWait(self.driver, 10).until(
-                            EC.presence_of_element_located((By.CLASS_NAME, "cities"))
-                        )
-                        time.sleep(1)
-                    except TimeoutException:
-                        self.emit_log(f"    ⏱️ Timeout lettre {letter}", "warning")
+                        kita = future.result()
+                    except Cancelled:
                         continue
-                    
-                    html = self.driver.page_source
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    # Trouver les villes
-                    cities_list = soup.find("ol", class_="cities list-unstyled")
-                    if not cities_list:
-                        cities_list = soup.find("ul", class_="cities")
-                    
-                    if cities_list:
-                        city_items = cities_list.find_all("li")
-                        self.emit_log(f"    🏙️ {len(city_items)} ville(s) trouvée(s)", "info")
-                        
-                        for city_item in city_items:
-                            city_link_elem = city_item.find("a")
-                            if not city_link_elem:
-                                continue
-                            
-                            city_text = city_item.get_text(strip=True)
-                            city_name, kita_count = self.extract_city_and_kitas(city_text)
-                            city_link = "https://www.kita.de" + city_link_elem.get("href")
-                            
-                            all_cities.append({
-                                'name': city_name,
-                                'link': city_link,
-                                'count': kita_count
-                            })
+                    except Exception as e:
+                        self.emit_log(f"        ⚠️ Erreur fiche: {str(e)}", "warning")
+                        self.count('errors')
+                        self.metrics.inc('errors_total', phase='detail')
+                        kita = None
+                    if kita is not None:
+                        kitas.append(kita)
+                missing += len(batch) - len(kitas)
+                
+                if self.index:
+                    self.index.record_profiles(kitas)
+                kitas = self.unique(kitas)
+                if kitas:
+                    self.emit_data(kitas)
+                    self.count('kitas', len(kitas))
+                    self.checkpoint('page', f"{link}#{batch[0][0]}", kitas, state)
+                    self.emit_city_done(state, link, kitas)
+                self.emit_progress()
+                self.emit_stats()
             
+            # L'état n'est terminé que si toutes ses fiches ont été lues
+            finished = not self.cancel.cancelled and missing == 0
+            if finished:
+                self.checkpoint('state', state, {'sitemap': len(entries)}, state)
+                self.progress.finish_state(state)
+            
+            self.emit_log(f"\n✅ État {state} terminé", "success")
+            return finished
+            
+        except Exception as e:
+            self.emit_log(f"❌ Erreur état {state}: {str(e)}", "error")
+            import traceback
+            self.emit_log(f"Traceback: {traceback.format_exc()}", "error")
+            self.count('errors')
+            self.metrics.inc('errors_total', phase='state')
+            return False
+    
+    def scrape_state(self, state):
+        """Scraper un état complet; retourne True si toutes ses villes sont terminées"""
+        try:
+            base_url = f"{self.base_url}/kitas"
+            state_slug = self.get_state_url_slug(state)
+            state_url = f"{base_url}/{state_slug}"
+            
+            self.emit_log(f"\n{'='*60}", "info")
+            self.emit_log(f"📂 ÉTAT: {state}", "info")
+            self.emit_log(f"{'='*60}", "info")
+            
+            status, progress = self.checkpoint_get('state', state)
+            if status == DONE:
+                self.progress.finish_state(state)
+                self.emit_log("  ⏭️ État déjà terminé (reprise)", "info")
+                return True
+            
+            if progress and 'cities' in progress:
+                all_cities = progress['cities']
+                self.emit_log("  ♻️ Liste des villes reprise du checkpoint", "info")
             else:
-                # SANS pagination alphabétique
-                self.emit_log("  📍 Pas de pagination alphabétique", "info")
-                
-                # Utiliser Selenium directement
-                self.emit_log("  🔄 Utilisation de Selenium pour extraire les villes...", "info")
-                try:
-                    # Attendre les éléments de ville
-                    WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, ".cities li a"))
-                    )
-                    
-                    city_elements = self.driver.find_elements(By.CSS_SELECTOR, ".cities li")
-                    
-                    if city_elements:
-                        self.emit_log(f"  🏙️ {len(city_elements)} ville(s) trouvée(s) avec Selenium", "info")
-                        
-                        for city_elem in city_elements:
-                            try:
-                                city_link_elem = city_elem.find_element(By.TAG_NAME, "a")
-                                city_text = city_elem.text
-                                city_name, kita_count = self.extract_city_and_kitas(city_text)
-                                city_href = city_link_elem.get_attribute("href")
-                                
-                                all_cities.append({
-                                    'name': city_name,
-                                    'link': city_href,
-                                    'count': kita_count
-                                })
-                            except:
-                                pass
-                    else:
-                        self.emit_log("  ❌ Aucune ville trouvée!", "error")
-                        # Screenshot pour debug
-                        try:
-                            screenshot_path = f"debug_screenshot_{state}.png"
-                            self.driver.save_screenshot(screenshot_path)
-                            self.emit_log(f"  📸 Screenshot sauvegardé: {screenshot_path}", "info")
-                        except:
-                            pass
-                        
-                except Exception as e:
-                    self.emit_log(f"  ⚠️ Erreur Selenium: {str(e)}", "warning")
+                all_cities = self.list_cities(state, state_url)
+                if all_cities and not self.cancel.cancelled:
+                    self.checkpoint('state', state, {'cities': all_cities}, state, status=PENDING)
             
             # Scraper toutes les villes trouvées
+            self.progress.add_cities(state, all_cities)
             total_cities = len(all_cities)
             self.emit_log(f"\n  ✅ Total: {total_cities} ville(s) à scraper", "info")
             
-            for idx, city_info in enumerate(all_cities):
-                if self.state['should_stop']:
-                    break
+            # Répartir les villes sur les workers (un navigateur du pool chacun au besoin)
+            def process_city(city_info):
+                if self.cancel.cancelled:
+                    return False
+                self.cancel.check()
                 
-                while self.state['should_pause']:
-                    time.sleep(0.5)
+                # Mode incrémental: même nombre de kitas et crawl récent -> pas de re-crawl
+                if self.settings.get('incremental', False) and not self.checkpoint_done('city', city_info['link']):
+                    if self.history.is_unchanged(city_info, self.settings.get('max_city_age_days', 7),
+                                                 self.settings.get('extract_details', False)):
+                        self.carry_forward(city_info)
+                        self.emit_stats()
+                        return True
                 
-                self.scrape_city(state_url, city_info['name'], city_info['link'])
+                finished = self.scrape_city(state_url, city_info['name'], city_info['link'], state, city_info.get('count'))
                 self.emit_stats()
+                return finished
+            
+            workers = self.workers()
+            if workers > 1 and total_cities > 1:
+                self.emit_log(f"  🧵 {min(workers, total_cities)} villes en parallèle", "info")
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='city') as executor:
+                    completed = list(executor.map(process_city, all_cities))
+            else:
+                completed = []
+                for city_info in all_cities:
+                    if self.cancel.cancelled:
+                        break
+                    completed.append(process_city(city_info))
+            
+            # L'état n'est terminé que si toutes ses villes le sont (et qu'au moins une a été trouvée)
+            finished = (not self.cancel.cancelled and total_cities > 0
+                        and all(completed) and len(completed) == total_cities)
+            if finished:
+                self.checkpoint('state', state, {'cities': all_cities}, state)
+                self.progress.finish_state(state)
             
             self.emit_log(f"\n✅ État {state} terminé", "success")
+            return finished
             
         except Exception as e:
             self.emit_log(f"❌ Erreur état {state}: {str(e)}", "error")
             import traceback
             self.emit_log(f"Traceback: {traceback.format_exc()}", "error")
+            self.count('errors')
+            self.metrics.inc('errors_total', phase='state')
+            return False
     
     def run(self):
         """Exécuter le scraping"""
@@ -575,21 +1193,55 @@ class KitaScraper:
             self.emit_log("🚀 DÉMARRAGE DU SCRAPING KITA.DE", "info")
             self.emit_log("="*60, "info")
             
-            if not self.setup_driver():
-                return
+            self.setup_fetcher()
+            self.setup_checkpoint()
+            self.replay_checkpoint()
+            self.setup_index()
+            self.setup_history()
+            
+            # Découverte par sitemap: les fiches sont lues par les workers de détail
+            sitemap = self.settings.get('discovery', 'listing') == 'sitemap'
+            if self.settings.get('extract_details', False) or sitemap:
+                self.setup_detail_pool()
+            
+            # En mode Selenium pur, vérifier le navigateur avant de commencer
+            if self.fetcher.mode == 'selenium':
+                try:
+                    with self.fetcher.browser.session():
+                        pass
+                except Exception:
+                    self.state['status'] = 'error'
+                    return
             
             total_states = len(self.states)
+            entries = self.discover_sitemap() if sitemap else {}
+            # États non terminés (erreur, villes ou pages manquantes): le run n'est pas complet
+            failed = []
             
             for idx, state in enumerate(self.states):
-                if self.state['should_stop']:
+                if self.cancel.cancelled:
                     break
                 
-                progress = (idx / total_states) * 100
-                self.emit_progress(progress, f"État {idx+1}/{total_states}: {state}")
+                self.emit_progress(f"État {idx+1}/{total_states}: {state}")
                 
-                self.scrape_state(state)
+                if entries.get(state):
+                    finished = self.scrape_state_sitemap(state, entries[state])
+                else:
+                    if sitemap:
+                        self.emit_log(f"🗺️ Aucune fiche de {state} dans les sitemaps: parcours des listes", "warning")
+                    finished = self.scrape_state(state)
+                if not finished and not self.cancel.cancelled:
+                    failed.append(state)
             
-            if not self.state['should_stop']:
+            if failed and not self.cancel.cancelled:
+                self.emit_log(f"\n❌ Scraping incomplet: {len(failed)} état(s) en échec ({', '.join(failed)})", "error")
+                self.emit_log(f"📊 Kitas: {self.state['stats']['kitas']}", "info")
+                self.emit_log(f"⚠️ Erreurs: {self.state['stats']['errors']}", "info")
+                self.state['status'] = 'error'
+                self.emit_stats()
+                self.send('status_update', {'status': 'error'})
+                self.emit_progress("Incomplet")
+            elif not self.cancel.cancelled:
                 self.emit_log("\n" + "="*60, "info")
                 self.emit_log("🎉 SCRAPING TERMINÉ !", "success")
                 self.emit_log("="*60, "info")
@@ -597,9 +1249,14 @@ class KitaScraper:
                 self.emit_log(f"📍 Villes: {self.state['stats']['cities']}", "info")
                 self.emit_log(f"⚠️ Erreurs: {self.state['stats']['errors']}", "info")
                 self.state['status'] = 'completed'
-                self.socketio.emit('status_update', {'status': 'completed'})
-                self.emit_progress(100, "Terminé")
+                self.send('status_update', {'status': 'completed'})
+                self.emit_progress("Terminé", done=True)
+            else:
+                self.stopped()
             
+        except Cancelled:
+            self.stopped()
+        
         except Exception as e:
             self.emit_log(f"❌ ERREUR: {str(e)}", "error")
             import traceback
@@ -607,6 +1264,21 @@ class KitaScraper:
             self.state['status'] = 'error'
         
         finally:
-            if self.driver:
-                self.driver.quit()
-                self.emit_log("🔌 WebDriver fermé", "info")
\ No newline at end of file
+            self.close_detail_pool()
+            self.log_summary()
+            if self.fetcher:
+                if self.fetcher.cache:
+                    self.emit_log(f"💾 Cache: {self.fetcher.cache.hits} page(s) servie(s), {self.fetcher.cache.misses} téléchargée(s)", "info")
+                if self.shared:
+                    # Limiteur, cache et navigateurs restent ouverts pour les autres jobs
+                    self.fetcher.http.close()
+                else:
+                    self.fetcher.close()
+                if self.frontier:
+                    self.frontier.close()
+                if self.history:
+                    self.history.close()
+                if self.index:
+                    self.index.close()
+                if self.driver_pool.launched and not self.shared:
+                    self.emit_log(f"🔌 WebDriver fermé ({self.driver_pool.launched} lancé(s))", "info")
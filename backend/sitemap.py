@@ -0,0 +1,118 @@
+import gzip
+import re
+from datetime import datetime, timezone
+from urllib.parse import urljoin, urlparse
+from lxml import etree
+
+NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+# Fiche d'une kita: /kita/<id>
+KITA_PATH = re.compile(r'/kita/([^/?#]+)/?$')
+
+
+def parse_lastmod(value):
+    """Date W3C du sitemap ('2024-03-01' ou '2024-03-01T10:00:00+01:00') en timestamp, ou None"""
+    if not value or not value.strip():
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def iter_entries(stream):
+    """Entrées ('sitemap' | 'url', loc, lastmod) d'un fichier sitemap, lues au fil de l'eau
+
+    Chaque élément est libéré après lecture: la mémoire reste constante même pour 50 000 URLs.
+    """
+    for _, elem in etree.iterparse(stream, events=('end',), tag=(f'{NS}url', f'{NS}sitemap')):
+        loc = (elem.findtext(f'{NS}loc') or '').strip()
+        if loc:
+            kind = 'sitemap' if elem.tag == f'{NS}sitemap' else 'url'
+            yield kind, loc, parse_lastmod(elem.findtext(f'{NS}lastmod'))
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+
+def slug_pattern(slugs):
+    """Regex qui trouve un slug d'état dans une URL ('kitas-bayern-1.xml.gz' -> 'bayern')
+
+    Les slugs les plus longs sont essayés d'abord: 'sachsen-anhalt' l'emporte sur 'sachsen'.
+    """
+    ordered = sorted(slugs, key=len, reverse=True)
+    return re.compile(r'(?<![a-z])(' + '|'.join(re.escape(slug) for slug in ordered) + r')(?![a-z])')
+
+
+class SitemapDiscovery:
+    """Découverte directe des fiches par les sitemaps du site (robots.txt, index, .xml.gz)
+
+    Les kitas sont rattachées à l'état du sitemap qui les liste (slug dans son nom ou celui d'un
+    sitemap parent), à défaut au slug de leur URL. Les sitemaps d'états non sélectionnés ne sont
+    pas téléchargés.
+    `open_url(url)` renvoie une réponse requests en streaming, `read_text(url)` le texte d'une page.
+    """
+
+    def __init__(self, base_url, slugs, open_url, read_text, selected=None):
+        self.base_url = base_url
+        self.slugs = list(slugs)
+        self.selected = set(selected or self.slugs)
+        self.pattern = slug_pattern(self.slugs)
+        self.open_url = open_url
+        self.read_text = read_text
+        self.sitemaps = 0
+        self.skipped = 0
+        self.unattributed = 0
+
+    def roots(self):
+        """Sitemaps annoncés par robots.txt, sinon /sitemap.xml"""
+        try:
+            robots = self.read_text(urljoin(self.base_url, '/robots.txt'))
+        except Exception:
+            robots = ''
+        roots = [line.split(':', 1)[1].strip() for line in robots.splitlines()
+                 if line.lower().startswith('sitemap:') and line.split(':', 1)[1].strip()]
+        return roots or [urljoin(self.base_url, '/sitemap.xml')]
+
+    def state_of(self, url):
+        match = self.pattern.search(urlparse(url).path.lower())
+        return match.group(1) if match else None
+
+    def read(self, url):
+        response = self.open_url(url)
+        try:
+            stream = response.raw
+            if urlparse(url).path.endswith('.gz') or 'gzip' in response.headers.get('Content-Type', ''):
+                stream = gzip.GzipFile(fileobj=stream)
+            yield from iter_entries(stream)
+        finally:
+            response.close()
+
+    def discover(self):
+        """{slug: [(url, lastmod), ...]} des fiches des états sélectionnés"""
+        found = {slug: [] for slug in self.selected}
+        pending = [(url, None) for url in self.roots()]
+        seen = set()
+        while pending:
+            url, inherited = pending.pop(0)
+            if url in seen:
+                continue
+            seen.add(url)
+            self.sitemaps += 1
+            for kind, loc, lastmod in self.read(url):
+                if kind == 'sitemap':
+                    state = self.state_of(loc) or inherited
+                    if state and state not in self.selected:
+                        self.skipped += 1
+                        continue
+                    pending.append((loc, state))
+                elif KITA_PATH.search(urlparse(loc).path):
+                    # Le sitemap parent décide: '/kita/kita-am-park-berlin' du sitemap de Bayern reste en Bayern
+                    state = inherited or self.state_of(loc)
+                    if state is None:
+                        self.unattributed += 1
+                    elif state in found:
+                        found[state].append((loc, lastmod))
+        return found
@@ -0,0 +1,20 @@
+import os
+import sqlite3
+
+# Dossier des bases locales (cache, reprises, résultats); surchargeable pour les tests et la prod
+DATA_DIR = os.environ.get('KITA_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+
+
+def data_path(filename):
+    """Chemin d'un fichier dans le dossier de données (créé au besoin)"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, filename)
+
+
+def connect(path):
+    """Connexion SQLite partageable entre threads, en mode WAL pour les accès concurrents"""
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
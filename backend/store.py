@@ -0,0 +1,119 @@
+import threading
+from storage import connect, data_path
+
+FIELDS = [
+    'id', 'name', 'street_address', 'postal_code', 'city', 'state',
+    'phone', 'email', 'website', 'url', 'description'
+]
+DETAIL_FIELDS = ['phone', 'email', 'website', 'description']
+FILTERS = ('id', 'state', 'city', 'postal_code')
+SORTABLE = ('seq', 'id', 'name', 'postal_code', 'city', 'state')
+
+
+class ResultStore:
+    """Stockage SQLite indexé des fiches scrapées (par job), à la place de la liste en mémoire"""
+
+    def __init__(self, path=None):
+        self.path = path or data_path('results.db')
+        self.lock = threading.Lock()
+        self.conn = connect(self.path)
+        self.conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS kitas (
+                job_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                {', '.join(f'{field} TEXT' for field in FIELDS)},
+                PRIMARY KEY (job_id, id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_kitas_seq ON kitas (job_id, seq);
+            CREATE INDEX IF NOT EXISTS idx_kitas_state ON kitas (job_id, state);
+            CREATE INDEX IF NOT EXISTS idx_kitas_city ON kitas (job_id, city);
+            CREATE INDEX IF NOT EXISTS idx_kitas_postal_code ON kitas (job_id, postal_code);
+            CREATE INDEX IF NOT EXISTS idx_kitas_name ON kitas (job_id, name);
+        """)
+        self.conn.commit()
+
+    def add(self, job_id, kitas):
+        """Insérer ou mettre à jour des fiches (unicité par job et `id`)"""
+        if not kitas:
+            return
+        columns = ', '.join(FIELDS)
+        placeholders = ', '.join('?' * len(FIELDS))
+        updates = ', '.join(f'{field} = excluded.{field}' for field in FIELDS if field != 'id')
+        with self.lock:
+            seq = self.conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM kitas WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+            self.conn.executemany(
+                f"INSERT INTO kitas (job_id, seq, {columns}) VALUES (?, ?, {placeholders}) "
+                f"ON CONFLICT (job_id, id) DO UPDATE SET {updates}",
+                [(job_id, seq + idx + 1, *[kita.get(field) for field in FIELDS]) for idx, kita in enumerate(kitas)]
+            )
+            self.conn.commit()
+
+    def update_details(self, job_id, updates):
+        """Fusionner les détails résolus par `id`"""
+        if not updates:
+            return
+        assignments = ', '.join(f'{field} = ?' for field in DETAIL_FIELDS)
+        with self.lock:
+            self.conn.executemany(
+                f"UPDATE kitas SET {assignments} WHERE job_id = ? AND id = ?",
+                [(*[update.get(field) for field in DETAIL_FIELDS], job_id, update['id']) for update in updates]
+            )
+            self.conn.commit()
+
+    def where(self, job_id, filters=None, search=None):
+        clauses = ["job_id = ?"]
+        params = [job_id]
+        for field, value in (filters or {}).items():
+            if field in FILTERS and value:
+                clauses.append(f"{field} = ?")
+                params.append(value)
+        if search:
+            clauses.append("(name LIKE ? OR city LIKE ? OR postal_code LIKE ?)")
+            params.extend([f"%{search}%"] * 3)
+        return ' AND '.join(clauses), params
+
+    def count(self, job_id, filters=None, search=None):
+        where, params = self.where(job_id, filters, search)
+        with self.lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM kitas WHERE {where}", params).fetchone()[0]
+
+    def query(self, job_id, filters=None, search=None, sort='seq', order='asc', limit=100, offset=0):
+        """Une page de fiches filtrées et triées via les index"""
+        where, params = self.where(job_id, filters, search)
+        sort = sort if sort in SORTABLE else 'seq'
+        order = 'DESC' if str(order).lower() == 'desc' else 'ASC'
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT {', '.join(FIELDS)} FROM kitas WHERE {where} ORDER BY {sort} {order}, seq LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def iter_rows(self, job_id, filters=None, search=None, batch_size=1000):
+        """Parcourir toutes les fiches par lots, dans l'ordre de collecte (pagination par `seq`)"""
+        where, params = self.where(job_id, filters, search)
+        last_seq = 0
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    f"SELECT seq, {', '.join(FIELDS)} FROM kitas WHERE {where} AND seq > ? ORDER BY seq LIMIT ?",
+                    params + [last_seq, batch_size]
+                ).fetchall()
+            if not rows:
+                return
+            last_seq = rows[-1]['seq']
+            for row in rows:
+                record = dict(row)
+                del record['seq']
+                yield record
+
+    def clear(self, job_id):
+        with self.lock:
+            self.conn.execute("DELETE FROM kitas WHERE job_id = ?", (job_id,))
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
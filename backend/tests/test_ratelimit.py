@@ -0,0 +1,81 @@
+import ratelimit
+import fetcher
+from ratelimit import AdaptiveRateLimiter, HostRateLimiter
+from fetcher import HttpFetcher
+
+URL = 'https://www.kita.de/kita/123'
+
+
+class Clock:
+    """Horloge simulée: le test avance le temps au lieu d'attendre"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_rate_holds_under_sporadic_server_errors(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit, 'time', clock)
+    limiter = AdaptiveRateLimiter(rate=10, max_rate=20)
+    bucket = limiter.bucket(URL)
+    # 10% de 503, une requête toutes les 1/rate secondes
+    for n in range(2000):
+        clock.now += 1 / bucket.rate
+        limiter.report(URL, 503 if n % 10 == 9 else 200, latency=0.05)
+    assert bucket.rate >= 5
+
+
+def test_rate_never_drops_below_min_rate(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit, 'time', clock)
+    limiter = AdaptiveRateLimiter(rate=8)
+    for _ in range(50):
+        clock.now += 10
+        limiter.report(URL, 503)
+    assert limiter.bucket(URL).rate == 2
+
+
+class Response:
+    def __init__(self, status, headers=None):
+        self.status_code = status
+        self.headers = headers or {}
+        self.content = b''
+        self.text = ''
+        self.url = URL
+
+
+def fetch_with(monkeypatch, responses):
+    limiter = HostRateLimiter(rate=1000, burst=10)
+    blocked = []
+    monkeypatch.setattr(limiter, 'block', lambda url, seconds: blocked.append(seconds))
+    monkeypatch.setattr(fetcher, 'backoff', lambda attempt: 0)
+    http = HttpFetcher(rate_limiter=limiter)
+    monkeypatch.setattr(http.session, 'get', lambda *args, **kwargs: responses.pop(0))
+    return http.fetch(URL), blocked
+
+
+def test_server_error_backs_off_the_request_only(monkeypatch):
+    result, blocked = fetch_with(monkeypatch, [Response(503), Response(200)])
+    assert result.status_code == 200
+    assert blocked == []
+
+
+def test_429_and_retry_after_pause_the_host(monkeypatch):
+    _, blocked = fetch_with(monkeypatch, [Response(429), Response(503, {'Retry-After': '3'}), Response(200)])
+    assert blocked == [0, 3.0]
+
+
+def test_browser_render_time_is_not_reported_as_latency(monkeypatch):
+    limiter = AdaptiveRateLimiter(rate=10, target_latency=0.0)
+    reports = []
+    monkeypatch.setattr(limiter, 'report', lambda url, status=200, latency=None, **kwargs: reports.append(latency))
+
+    class Driver:
+        def get(self, url):
+            pass
+
+    fetcher.BrowserFetcher(None, rate_limiter=limiter).navigate(Driver(), URL)
+    assert reports == [None]
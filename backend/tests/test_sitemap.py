@@ -0,0 +1,48 @@
+import io
+from sitemap import NS, SitemapDiscovery
+
+SLUGS = ['bayern', 'berlin', 'sachsen', 'sachsen-anhalt']
+BASE = 'https://www.kita.de'
+
+
+class Response:
+    def __init__(self, xml):
+        self.raw = io.BytesIO(xml.encode('utf-8'))
+        self.headers = {}
+
+    def close(self):
+        pass
+
+
+def urlset(*locs):
+    items = ''.join(f'<url><loc>{loc}</loc></url>' for loc in locs)
+    return f'<urlset xmlns="{NS[1:-1]}">{items}</urlset>'
+
+
+def index(*locs):
+    items = ''.join(f'<sitemap><loc>{loc}</loc></sitemap>' for loc in locs)
+    return f'<sitemapindex xmlns="{NS[1:-1]}">{items}</sitemapindex>'
+
+
+def discovery(pages, selected=None):
+    return SitemapDiscovery(BASE, SLUGS, lambda url: Response(pages[url]), lambda url: '', selected=selected)
+
+
+def test_state_of_chunked_sitemaps():
+    d = discovery({})
+    assert d.state_of(f'{BASE}/sitemaps/kitas-bayern-1.xml.gz') == 'bayern'
+    assert d.state_of(f'{BASE}/sitemap-sachsen-2.xml') == 'sachsen'
+    assert d.state_of(f'{BASE}/sitemaps/kitas-sachsen-anhalt-3.xml.gz') == 'sachsen-anhalt'
+    assert d.state_of(f'{BASE}/sitemaps/kitas-bayerns.xml') is None
+
+
+def test_url_entries_keep_the_parent_sitemap_state():
+    pages = {
+        f'{BASE}/sitemap.xml': index(f'{BASE}/sitemaps/kitas-bayern-1.xml', f'{BASE}/sitemaps/misc.xml'),
+        f'{BASE}/sitemaps/kitas-bayern-1.xml': urlset(f'{BASE}/kita/kita-am-park-berlin', f'{BASE}/kita/123'),
+        f'{BASE}/sitemaps/misc.xml': urlset(f'{BASE}/kita/kita-berlin-mitte', f'{BASE}/kita/456'),
+    }
+    found = discovery(pages, selected=['bayern', 'berlin']).discover()
+    assert found['bayern'] == [(f'{BASE}/kita/kita-am-park-berlin', None), (f'{BASE}/kita/123', None)]
+    # Sans état hérité, le slug de l'URL décide
+    assert found['berlin'] == [(f'{BASE}/kita/kita-berlin-mitte', None)]
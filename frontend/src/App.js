@@ -29,6 +29,8 @@ const KitaScraperApp = () => {
   const logsEndRef = useRef(null);
   const statusRef = useRef('idle');
   const socketRef = useRef(null);
+  // Job suivi par l'interface (les autres jobs du serveur continuent sans être affichés)
+  const jobIdRef = useRef(null);
 
   const states = [
     'Baden-Württemberg', 'Bayern', 'Berlin', 'Brandenburg', 'Bremen',
@@ -66,6 +68,20 @@ const KitaScraperApp = () => {
       withCredentials: true
     });
 
+    // Les événements arrivent aussi regroupés dans des lots 'batch': même traitement
+    // Plusieurs jobs peuvent tourner: seuls ceux du job suivi sont affichés
+    const handlers = {};
+    const on = (event, handler) => {
+      const forCurrentJob = (data) => {
+        if (data && data.job_id && jobIdRef.current && data.job_id !== jobIdRef.current) {
+          return;
+        }
+        handler(data);
+      };
+      handlers[event] = forCurrentJob;
+      socket.on(event, forCurrentJob);
+    };
+
     socket.on('connect', () => {
       setIsConnected(true);
       addLog('✅ Connecté au serveur backend', 'success');
@@ -76,24 +92,32 @@ const KitaScraperApp = () => {
       addLog('❌ Déconnecté du serveur', 'error');
     });
 
-    socket.on('log', (data) => {
+    on('log', (data) => {
       addLog(data.message, data.level);
     });
 
-    socket.on('progress', (data) => {
+    on('progress', (data) => {
       setProgress(data.progress);
       setCurrentTask(data.task);
     });
 
-    socket.on('data', (data) => {
+    on('data', (data) => {
       setScrapedData(prev => [...prev, ...data.kitas]);
     });
 
-    socket.on('stats', (data) => {
+    // Détails résolus après coup: fusion par id
+    on('data_update', (data) => {
+      const updates = new Map(data.kitas.map(kita => [kita.id, kita]));
+      setScrapedData(prev => prev.map(kita => (
+        updates.has(kita.id) ? { ...kita, ...updates.get(kita.id) } : kita
+      )));
+    });
+
+    on('stats', (data) => {
       setStats(data.stats);
     });
 
-    socket.on('status_update', (data) => {
+    on('status_update', (data) => {
       setStatus(data.status);
       
       // Si le scraping est terminé, sauvegarder dans l'historique
@@ -107,13 +131,13 @@ const KitaScraperApp = () => {
       }
     });
 
-    socket.on('error', (data) => {
+    on('error', (data) => {
       setErrorMessage(data.message);
       setStatus('error');
     });
 
     // Nouvelle écoute pour les mises à jour de progression détaillées
-    socket.on('progress_update', (data) => {
+    on('progress_update', (data) => {
       setProgress(data.progress);
       setCurrentTask(data.task);
       setProgressDetails({
@@ -124,6 +148,14 @@ const KitaScraperApp = () => {
       setStats(data.stats);
     });
 
+    socket.on('batch', (batch) => {
+      batch.events.forEach(({ event, data }) => {
+        if (handlers[event]) {
+          handlers[event](data);
+        }
+      });
+    });
+
     socket.on('connect_error', (error) => {
       console.error('Connection Error:', error);
       setIsConnected(false);
@@ -266,7 +298,13 @@ const KitaScraperApp = () => {
         throw new Error(result.error || 'Erreur lors du démarrage du scraping');
       }
 
-      addLog('✅ Scraping démarré sur le serveur', 'success');
+      jobIdRef.current = result.job_id;
+      if (result.status === 'queued') {
+        setStatus('queued');
+        addLog(`⏳ Job ${result.job_id} en file d'attente (trop de jobs en cours)`, 'warning');
+      } else {
+        addLog(`✅ Scraping démarré sur le serveur (job ${result.job_id})`, 'success');
+      }
     } catch (error) {
       setErrorMessage(`Erreur: ${error.message}`);
       setStatus('error');
@@ -276,7 +314,11 @@ const KitaScraperApp = () => {
 
   const pauseScraping = async () => {
     try {
-      await fetch('http://localhost:5000/api/pause-scraping', { method: 'POST' });
+      await fetch('http://localhost:5000/api/pause-scraping', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ job_id: jobIdRef.current })
+      });
       setStatus('paused');
       addLog('⏸️ Scraping mis en pause', 'warning');
     } catch (error) {
@@ -286,7 +328,11 @@ const KitaScraperApp = () => {
 
   const resumeScraping = async () => {
     try {
-      await fetch('http://localhost:5000/api/resume-scraping', { method: 'POST' });
+      await fetch('http://localhost:5000/api/resume-scraping', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ job_id: jobIdRef.current })
+      });
       setStatus('running');
       addLog('▶️ Scraping repris', 'info');
     } catch (error) {
@@ -296,7 +342,11 @@ const KitaScraperApp = () => {
 
   const stopScraping = async () => {
     try {
-      await fetch('http://localhost:5000/api/stop-scraping', { method: 'POST' });
+      await fetch('http://localhost:5000/api/stop-scraping', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ job_id: jobIdRef.current })
+      });
       setStatus('stopped');
       addLog('⏹️ Scraping arrêté par l\'utilisateur', 'warning');
       setCurrentTask('');
@@ -630,7 +680,7 @@ const KitaScraperApp = () => {
                 <div className="grid grid-cols-1 md:grid-cols-3 gap-6">
                   <div>
                     <label className="block text-sm font-medium text-gray-700 mb-2">
-                      Délai entre requêtes (ms)
+                      Délai initial entre requêtes (ms)
                     </label>
                     <input
                       type="number"
@@ -640,7 +690,7 @@ const KitaScraperApp = () => {
                       min="100"
                       max="5000"
                     />
-                    <p className="mt-1 text-xs text-gray-500">Recommandé: 500ms</p>
+                    <p className="mt-1 text-xs text-gray-500">Recommandé: 500ms (ajusté selon les réponses du site)</p>
                   </div>
                   <div>
                     <label className="block text-sm font-medium text-gray-700 mb-2">